@@ -0,0 +1,62 @@
+"""Decoding time of BoardEncoder JSON boards: the as_board object_hook against load_board_json.
+
+Run from anywhere with `python benchmarks/bench_board_json.py`, every timing is the best of
+REPEATS runs. The "gc off" column decodes with the cyclic garbage collector disabled, to
+show how much of the time goes into collections triggered by the allocations.
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(SRC, "server"))
+
+from gen_game import generate_game
+from common.dto import PlayerInfoDTO
+from common.serialization.serialize_board import BoardEncoder, as_board, load_board_json
+
+SIZES = [(30, 50), (100, 100), (200, 200)]
+NUM_PLAYERS = 4
+REPEATS = 5
+
+def best_time(decode, data) -> float:
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        decode(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def without_gc(decode):
+    def decode_without_gc(data):
+        gc.disable()
+        try:
+            return decode(data)
+        finally:
+            gc.enable()
+    return decode_without_gc
+
+def main():
+    decoders = [
+        ("as_board", lambda data: json.loads(data, object_hook = as_board)),
+        ("load_board_json", load_board_json),
+    ]
+    print(f"{'board':>9} {'size':>8} " + " ".join(f"{name:>16} {'gc off':>8}" for name, _ in decoders))
+    for width, height in SIZES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            board, _ = generate_game([PlayerInfoDTO(f"p{i}", (i, 2, 3)) for i in range(NUM_PLAYERS)], width, height, seed = 1)
+        data = json.dumps(board, cls = BoardEncoder).encode()
+        timings = []
+        for _, decode in decoders:
+            timings.append(best_time(decode, data))
+            timings.append(best_time(without_gc(decode), data))
+        print(f"{width:>4}x{height:<4} {len(data) // 1024:>5} KB " + " ".join(f"{t * 1e3:>13.1f} ms {t2 * 1e3:>5.1f} ms" for t, t2 in zip(timings[::2], timings[1::2])))
+
+if __name__ == "__main__":
+    main()
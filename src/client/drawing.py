@@ -1,10 +1,12 @@
 from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 import pygame
 import sys
 
 sys.path.append("../")
-from common.base_classes import Board, Player, Piece, TileType, PlayerTurn
+from common.base_classes import Board, Player, Piece, Tile, TileType, PlayerTurn
+from common.serialization.board_delta import piece_records, changed_indices
 from logic import can_piece_act
 
 ################################# Drawing Configuration #############################
@@ -45,23 +47,90 @@ BREAK_DOT_COLOR = (255, 0, 0)
 
 BACKGROUND_COLOR = (100, 100, 100)
 
-def draw_board(screen, board: Board):
-    screen.fill(BLACK)
+# Rendered text surfaces kept for reuse
+TEXT_CACHE_SIZE = 256
 
-    for x in range(board.height):
-        for y in range(board.width):
-            tile = board.get_tile(x, y)
-            color = TileColors[tile.type.name].value
-            pygame.draw.rect(screen, color, (y * TILE_SIZE, x * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+def tile_rect(x: int, y: int) -> pygame.Rect:
+    return pygame.Rect(y * TILE_SIZE, x * TILE_SIZE, TILE_SIZE, TILE_SIZE)
 
-            for piece in tile.pieces:
-                piece_color = None
-                if piece.is_ghost:
-                    piece_color = (piece.color[0] + 50, piece.color[1] + 50, piece.color[2] + 50)
-                else:
-                    piece_color = piece.color
-                center = (y * TILE_SIZE + TILE_SIZE // 2, x * TILE_SIZE + TILE_SIZE // 2)
-                pygame.draw.circle(screen, piece_color, center, TILE_SIZE // 3)
+def draw_tile(surface, tile: Tile, x: int, y: int):
+    color = TileColors[tile.type.name].value
+    pygame.draw.rect(surface, color, tile_rect(x, y))
+
+    for piece in tile.pieces:
+        piece_color = None
+        if piece.is_ghost:
+            piece_color = (piece.color[0] + 50, piece.color[1] + 50, piece.color[2] + 50)
+        else:
+            piece_color = piece.color
+        center = (y * TILE_SIZE + TILE_SIZE // 2, x * TILE_SIZE + TILE_SIZE // 2)
+        pygame.draw.circle(surface, piece_color, center, TILE_SIZE // 3)
+
+class BoardRenderer:
+    """Keeps the board drawn on a surface of its own and only redraws the tiles that changed.
+
+    draw() returns the screen rectangles to pass to pygame.display.update, nothing when
+    neither the board nor the selected piece changed since the last frame.
+    """
+    def __init__(self):
+        self.surface = None
+        self.key = None
+        self.codes = None
+        self.pieces = {}
+        self.overlay_key = None
+        self.overlay_rects = []
+
+    def invalidate(self):
+        """Redraws everything on the next frame, after the window content was lost."""
+        self.surface = None
+
+    def draw(self, screen, board: Board, selected_piece: Optional[Piece] = None, turn: Optional[PlayerTurn] = None) -> List[pygame.Rect]:
+        rects = []
+        size = (board.width * TILE_SIZE, board.height * TILE_SIZE)
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = pygame.Surface(size)
+            self.key = None
+            self.codes = None
+            screen.fill(BLACK)
+            rects.append(screen.get_rect())
+
+        key = (id(board), board.view_key())
+        if key != self.key:
+            self.key = key
+            rects += self._redraw_tiles(board)
+
+        overlay_key = (key, id(selected_piece)) if selected_piece else None
+        if overlay_key != self.overlay_key or rects:
+            # Possible moves are drawn on the screen only, their old dots are covered by the board surface
+            self.overlay_key = overlay_key
+            rects += self.overlay_rects
+            self.overlay_rects = [tile_rect(x, y) for x, y in board.get_neighbors(*selected_piece.position)] if selected_piece else []
+            rects += self.overlay_rects
+
+        if not rects:
+            return rects
+        for rect in rects:
+            screen.blit(self.surface, rect, rect)
+        if selected_piece:
+            draw_possible_moves(screen, board, selected_piece, turn)
+        return rects
+
+    def _redraw_tiles(self, board: Board) -> List[pygame.Rect]:
+        codes = board.tile_codes()
+        pieces = piece_records(board)
+        if self.codes is None or len(self.codes) != len(codes):
+            dirty = [(x, y) for x in range(board.height) for y in range(board.width)]
+        else:
+            dirty = {divmod(i, board.width) for i in changed_indices(self.codes, codes)}
+            dirty.update(position for position in self.pieces.keys() | pieces.keys() if self.pieces.get(position) != pieces.get(position))
+        self.codes = codes
+        self.pieces = pieces
+
+        for x, y in dirty:
+            draw_tile(self.surface, board.get_tile(x, y), x, y)
+        if len(dirty) == board.width * board.height:
+            return [self.surface.get_rect()]
+        return [tile_rect(x, y) for x, y in dirty]
 
 selected_piece = None
 
@@ -96,12 +165,19 @@ def draw_possible_moves(screen, board: Board, piece: Piece, turn: PlayerTurn):
 
 ################################# Pages #############################
 
+@lru_cache(maxsize = None)
+def get_font(size: int) -> pygame.font.Font:
+    return pygame.font.Font(None, size)
+
+@lru_cache(maxsize = TEXT_CACHE_SIZE)
+def render_text(text: str, color: tuple, size: int) -> pygame.Surface:
+    """Text rendered with the default font, pages draw the same few lines every frame."""
+    return get_font(size).render(text, True, color)
+
 # Draw text
 def draw_text(screen, text, x, y, color=WHITE):
     width, height = screen.get_size()
-    font = pygame.font.Font(None, height // 20)
-    text_surface = font.render(text, True, color)
-    screen.blit(text_surface, (x, y))
+    screen.blit(render_text(text, tuple(color), height // 20), (x, y))
 
 # Draw welcome page
 def draw_welcome_page(screen, input_text, rgb, selected_channel):
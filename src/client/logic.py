@@ -3,7 +3,7 @@ from common.base_classes import Board, Player, TileType, Piece, PlayerTurn, Tile
 from common.constants import NUMBER_ACTIONS
 
 def remove_piece(board: Board, piece: Piece):
-    board.get_tile(piece.position[0], piece.position[1]).pieces.remove(piece)
+    board.remove_piece(piece)
 
 def move_piece(board: Board, piece: Piece, x: int, y: int, turn: PlayerTurn):
     if piece.is_ghost:
@@ -20,13 +20,13 @@ def move_piece(board: Board, piece: Piece, x: int, y: int, turn: PlayerTurn):
 
     for p in new_tile.pieces:
         if p.owner == piece.owner and p.is_ghost and p.number == piece.number:
-            p.is_ghost = False
+            board.set_ghost(p, False)
             remove_piece(board, piece)
             return True
 
     if can_piece_act(turn, piece):
-        piece.is_ghost = True
-        new_tile.pieces.append(Piece(piece.number, (x, y), piece.owner, False, piece.color))
+        board.set_ghost(piece, True)
+        board.add_piece(Piece(piece.number, (x, y), piece.owner, False, piece.color))
         return True
     return False
 
@@ -40,7 +40,7 @@ def break_wall(board: Board, piece: Piece, x: int, y: int, turn: PlayerTurn):
     if not board.can_break_wall(x, y):
         return False
 
-    board.get_tile(x, y).type = TileType.FLOOR
+    board.set_tile_type(x, y, TileType.FLOOR)
     return True
 
 def can_piece_act(turn: PlayerTurn, piece: Piece):
@@ -1,68 +1,38 @@
 import pygame
 import socket
 import json
-import select
 import sys
 
-from drawing import draw_welcome_page, draw_waiting_page, draw_board, draw_possible_moves, draw_gameover, TILE_SIZE
+from drawing import draw_welcome_page, draw_waiting_page, BoardRenderer, draw_gameover, TILE_SIZE
 from common.dto import PlayerInfoDTO
-from common.serialization.serialize_board import as_board
-from common.serialization.serialize_player_turn import PlayerTurnEncoder
 from common.base_classes import PlayerTurn
+from common.compression import choose_compression, set_compression
+from network import NetworkClient, send_message, receive_message, PLAYERS, BOARD, CLOSED
 from logic import move_piece, break_wall
 
+FPS = 30
 
 def connect_to_server(address):
     client_socket = socket.create_connection(address)
     print("Connected to server.")
     return client_socket
 
-def send_message(conn, message):
-    try:
-        conn.sendall(message.encode())
-        print(f"Sent message: {message}")
-    except Exception as e:
-        print(f"Error sending message: {e}")
-
-def receive_message(conn, buffer_size=(1 * 10 ** 9)):
-    try:
-        data = conn.recv(buffer_size).decode()
-        if data:
-            #print(f"Received message: {data}")
-            return data
-    except Exception as e:
-        print(f"Error receiving message: {e}")
-        return None
-
 ################################
 
-def receive_players(client_socket):
-    data = receive_message(client_socket)
-    if data:
-        players = [PlayerInfoDTO(**player) for player in json.loads(data)]
-        print("Received players list from server.")
-        return players
-
 def receive_num_players(client_socket):
     data = receive_message(client_socket)
     if data:
-        num_players = int(data)
-        print(f"Received number of players: {num_players}")
-        return num_players
-
-def receive_player_board(client_socket):
-    data = receive_message(client_socket)
-    print("Board received.")
-    return json.loads(data, object_hook = as_board)
-
-def send_turn(client_socket, turn):
-    send_message(client_socket, json.dumps(turn, cls = PlayerTurnEncoder))
+        message = json.loads(data)
+        if isinstance(message, int):
+            message = {"num_players": message, "compression": []}
+        print(f"Received number of players: {message['num_players']}")
+        return message["num_players"], message["compression"]
 
 #################################
 
 def main():
     client_socket = connect_to_server(("localhost", 8000))
-    num_players = receive_num_players(client_socket)
+    num_players, offered_compression = receive_num_players(client_socket)
 
     pygame.init()
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
@@ -71,10 +41,12 @@ def main():
     player_name = ""
     rgb = [128, 128, 128]
     selected_channel = 0  # 0 for R, 1 for G, 2 for B
+    clock = pygame.time.Clock()
 
     while page=="welcome":
         draw_welcome_page(screen, player_name, rgb, selected_channel)
         pygame.display.flip()
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -88,7 +60,14 @@ def main():
                     if event.key == pygame.K_RETURN:
                         if player_name:
                             player_info = PlayerInfoDTO(player_name, tuple(rgb))
-                            send_message(client_socket, json.dumps(player_info.__dict__))
+                            if offered_compression:
+                                compression = choose_compression(offered_compression)
+                                send_message(client_socket, json.dumps(dict(player_info.__dict__, compression = compression)))
+                                set_compression(client_socket, compression)
+                            else:
+                                send_message(client_socket, json.dumps(player_info.__dict__))
+                            network = NetworkClient(client_socket)
+                            network.start()
                             page = "waiting"
                     elif event.key == pygame.K_BACKSPACE:
                         player_name = player_name[:-1]
@@ -101,16 +80,22 @@ def main():
                         player_name += event.unicode
 
     players = []
+    board = None
 
     while page=="waiting":
-        ready_to_read, _, _ = select.select([client_socket], [], [], 1)
-        if client_socket in ready_to_read:
-            players = receive_players(client_socket)
-            if len(players) == num_players:
+        for kind, value in network.poll():
+            if kind == PLAYERS:
+                players = value
+                print("Received players list from server.")
+            elif kind == BOARD:
+                board = value
                 page = "game"
+            elif kind == CLOSED:
+                return
 
         draw_waiting_page(screen, players, num_players)
         pygame.display.flip()
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -118,23 +103,38 @@ def main():
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 return
 
-    board = receive_player_board(client_socket)
-    turn = PlayerTurn(player_name)
+    turn = PlayerTurn(player_name, board.turn_number)
     selected_piece = None
+    turn_sent = False
+    renderer = BoardRenderer()
 
     while page=="game":
-        draw_board(screen, board)
-        if selected_piece:
-            draw_possible_moves(screen, board, selected_piece, turn)
-        pygame.display.flip()
+        for kind, value in network.poll():
+            if kind == BOARD:
+                board = value
+                turn.clear_actions()
+                turn.turn_number = board.turn_number
+                selected_piece = None
+                turn_sent = False
+                if board.gameover:
+                    page = "gameover"
+            elif kind == CLOSED:
+                return
+
+        dirty_rects = renderer.draw(screen, board, selected_piece, turn)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 return
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
 
-            elif event.type == pygame.MOUSEBUTTONDOWN:
+            elif event.type == pygame.MOUSEBUTTONDOWN and not turn_sent:
                 x, y = event.pos[1] // TILE_SIZE, event.pos[0] // TILE_SIZE
                 clicked_tile = board.get_tile(x, y)
                 if not selected_piece:
@@ -153,16 +153,14 @@ def main():
                     selected_piece = None
 
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    send_turn(client_socket, turn)
-                    board = receive_player_board(client_socket)
-                    turn.clear_actions()
-                    if board.gameover:
-                        page = "gameover"
+                if event.key == pygame.K_RETURN and not turn_sent:
+                    network.send_turn(turn)
+                    turn_sent = True
 
     while page == "gameover":
         draw_gameover(screen)
         pygame.display.flip()
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
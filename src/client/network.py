@@ -0,0 +1,127 @@
+import json
+import queue
+import threading
+from typing import List, Optional, Tuple
+
+from common.base_classes import Board
+from common.dto import PlayerInfoDTO
+from common.framing import send_frame, receive_frame
+from common.compression import compress_message, decompress_message
+from common.serialization.board_delta import DeltaDecoder
+from common.serialization.serialize_player_turn import PlayerTurnEncoder
+
+PLAYERS = "players"
+BOARD = "board"
+CLOSED = "closed"
+
+def send_message(conn, message):
+    try:
+        send_frame(conn, compress_message(conn, message.encode()))
+        print(f"Sent message: {message}")
+    except Exception as e:
+        print(f"Error sending message: {e}")
+
+def receive_data(conn):
+    try:
+        data = receive_frame(conn)
+        return decompress_message(conn, data) if data else data
+    except Exception as e:
+        print(f"Error receiving message: {e}")
+        return None
+
+def receive_message(conn):
+    data = receive_data(conn)
+    if data:
+        #print(f"Received message: {data}")
+        return data.decode()
+
+class NetworkClient:
+    """Receives and decodes server messages on a background thread.
+
+    The render loop calls poll() every frame and gets (kind, value) pairs: the lobby
+    player list, the Board to draw or CLOSED once the server is gone.
+
+    Boards are double buffered. The network thread patches the back board in place while
+    the render loop uses the front one, poll() swaps them once the back board holds a newer
+    update. Each board keeps the tiles it missed while it was not the one being patched,
+    None when it has to be rebuilt after a keyframe.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.messages = queue.Queue()
+        self.board_decoder = DeltaDecoder()
+        self.lock = threading.Lock()
+        self.front = None
+        self.back = None
+        self.front_stale = None
+        self.back_stale = None
+        self.back_ready = False
+        self.thread = threading.Thread(target = self._receive_loop, name = "network", daemon = True)
+
+    def start(self):
+        self.thread.start()
+
+    def _receive_loop(self):
+        while True:
+            data = receive_data(self.conn)
+            if not data:
+                self.messages.put((CLOSED, None))
+                return
+            try:
+                if data[:1] == b"[":
+                    self.messages.put((PLAYERS, [PlayerInfoDTO(**player) for player in json.loads(data)]))
+                else:
+                    self._receive_board(data)
+                    self.messages.put((BOARD, None))
+                    print("Board received.")
+            except ValueError as e:
+                print(f"Error decoding message: {e}")
+
+    def _receive_board(self, data: bytes):
+        keyframe, changed_tiles, gameover = self.board_decoder.update(data)
+        with self.lock:
+            # The render loop does not take the back board while it is being patched
+            self.back_ready = False
+            board, stale = self.back, self.back_stale
+            if keyframe is not None:
+                self.front_stale = None
+            elif self.front_stale is not None:
+                self.front_stale |= changed_tiles
+
+        if keyframe is not None:
+            board = keyframe
+        elif board is None or stale is None:
+            board = self.board_decoder.state.to_board()
+            board.gameover = gameover
+        else:
+            self.board_decoder.patch(board, stale | changed_tiles, gameover)
+
+        with self.lock:
+            self.back, self.back_stale = board, set()
+            self.back_ready = True
+
+    def _swap_boards(self) -> Optional[Board]:
+        with self.lock:
+            if not self.back_ready:
+                return None
+            self.front, self.back = self.back, self.front
+            self.front_stale, self.back_stale = self.back_stale, self.front_stale
+            self.back_ready = False
+            return self.front
+
+    def poll(self) -> List[Tuple[str, object]]:
+        """Pending messages, boards received since the last poll come as one BOARD with the newest board."""
+        messages = []
+        while True:
+            try:
+                kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                return messages
+            if kind == BOARD:
+                value = self._swap_boards()
+                if value is None:
+                    continue
+            messages.append((kind, value))
+
+    def send_turn(self, turn):
+        send_message(self.conn, json.dumps(turn, cls = PlayerTurnEncoder))
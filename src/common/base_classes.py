@@ -1,13 +1,14 @@
 from enum import Enum
-from typing import List
+from typing import Dict, List, Tuple
 
 class Player:
-    def __init__(self, name: str, color: tuple[int, int, int], board_width: int, board_height: int, spawn: tuple[int, int]):
+    def __init__(self, name: str, color: tuple[int, int, int], board_width: int, board_height: int, spawn: tuple[int, int], board_class: type = None):
         self.name = name
         self.color = color
-        self.board = Board(board_width, board_height, TileType.UNKNOWN)
+        self.board = (board_class or Board)(board_width, board_height, TileType.UNKNOWN)
         self.spawn = spawn
         self.pieces_exited = 0
+        self.vision = None
 
 class Piece:
     def __init__(self, number: int, position: tuple[int, int], owner: str, is_ghost: bool, color: tuple[int, int, int]):
@@ -35,19 +36,35 @@ class TileType(Enum):
 
     CLOSED_EXIT = "CLOSED_EXIT"
 
+TILE_TYPES = list(TileType)
+TILE_CODES = {tile_type: code for code, tile_type in enumerate(TILE_TYPES)}
+
+FLOOR_TYPES = frozenset([TileType.FLOOR, TileType.FOG_FLOOR, TileType.SPAWN, TileType.EXIT, TileType.CHEST, TileType.TRAP, TileType.CLOSED_EXIT])
+WALL_TYPES = frozenset([TileType.WALL, TileType.FOG_WALL])
+FOG_TYPES = frozenset([TileType.UNKNOWN, TileType.FOG_VOID, TileType.FOG_WALL, TileType.FOG_FLOOR])
+
+def fog_type(tile_type: TileType) -> TileType:
+    if tile_type == TileType.UNKNOWN:
+        return TileType.UNKNOWN
+    if tile_type in FLOOR_TYPES:
+        return TileType.FOG_FLOOR
+    if tile_type in WALL_TYPES:
+        return TileType.FOG_WALL
+    return TileType.FOG_VOID
+
 class Tile:
     def __init__(self, tile_type: TileType):
         self.type = tile_type
         self.pieces: List['Piece'] = []
 
     def is_floor(self) -> bool:
-        return self.type in [TileType.FLOOR, TileType.FOG_FLOOR, TileType.SPAWN, TileType.EXIT, TileType.CHEST, TileType.TRAP, TileType.CLOSED_EXIT]
+        return self.type in FLOOR_TYPES
     
     def is_wall(self) -> bool:
-        return self.type in [TileType.WALL, TileType.FOG_WALL]
+        return self.type in WALL_TYPES
     
     def is_clear(self) -> bool:
-        return self.type not in [TileType.UNKNOWN, TileType.FOG_VOID, TileType.FOG_WALL, TileType.FOG_FLOOR]
+        return self.type not in FOG_TYPES
 
     def break_wall(self):
         if self.type == TileType.WALL:
@@ -56,11 +73,19 @@ class Tile:
             self.type = TileType.FOG_FLOOR
 
 class Board:
-    def __init__(self, width: int, height: int, base_tile_type: TileType):
-        self.tiles: List[List[Tile]] = [[Tile(base_tile_type) for _ in range(width)] for _ in range(height)]
+    def __init__(self, width: int, height: int, base_tile_type: TileType, tiles: List[List[Tile]] = None):
+        self.tiles: List[List[Tile]] = tiles if tiles is not None else [[Tile(base_tile_type) for _ in range(width)] for _ in range(height)]
         self.width = width
         self.height = height
         self.gameover = False
+        # Turns played on the game board, player boards and the boards sent carry the turn they show
+        self.turn_number = 0
+        self.piece_index: Dict[Tuple[str, int, bool], List[Piece]] = {}
+        self.changed_tiles = set()
+        self.breakable = None
+        self.version = 0
+        self.pieces_version = 0
+        self.tile_listeners = []
         
     def get_neighbors(self, x, y, include_diagonals=False):
         directions = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]  # up, down, left, right
@@ -72,33 +97,124 @@ class Board:
         return x < 0 or x >= self.height or y < 0 or y >= self.width
     
     def can_break_wall(self, x, y):
+        if self.out_of_bounds(x, y):
+            return False
+        if self.breakable is None:
+            self.breakable = self.compute_breakable()
+        return self.breakable[x][y]
+
+    def compute_breakable(self):
+        return [[self._can_break_wall(x, y) for y in range(self.width)] for x in range(self.height)]
+
+    def _can_break_wall(self, x, y):
         if x == 0 or x == self.height-1 or y == 0 or y == self.width-1:
             return False
 
-        if x > 0 and y > 0 and self.get_tile(x-1, y).is_floor() and self.get_tile(x, y-1).is_floor() and self.get_tile(x-1, y-1).is_floor():
+        if self.is_floor(x-1, y) and self.is_floor(x, y-1) and self.is_floor(x-1, y-1):
             return False
-        if x > 0 and y < self.width-1 and self.get_tile(x-1, y).is_floor() and self.get_tile(x, y+1).is_floor() and self.get_tile(x-1, y+1).is_floor():
+        if self.is_floor(x-1, y) and self.is_floor(x, y+1) and self.is_floor(x-1, y+1):
             return False
-        if x < self.height-1 and y > 0 and self.get_tile(x+1, y).is_floor() and self.get_tile(x, y-1).is_floor() and self.get_tile(x+1, y-1).is_floor():
+        if self.is_floor(x+1, y) and self.is_floor(x, y-1) and self.is_floor(x+1, y-1):
             return False
-        if x < self.height-1 and y < self.width-1 and self.get_tile(x+1, y).is_floor() and self.get_tile(x, y+1).is_floor() and self.get_tile(x+1, y+1).is_floor():
+        if self.is_floor(x+1, y) and self.is_floor(x, y+1) and self.is_floor(x+1, y+1):
             return False
         return True
+
+    def _patch_breakable(self, x, y):
+        # Breakability only depends on the 3x3 block around a tile
+        for nx in range(max(0, x-1), min(self.height, x+2)):
+            for ny in range(max(0, y-1), min(self.width, y+2)):
+                self.breakable[nx][ny] = self._can_break_wall(nx, ny)
+
+    def is_floor(self, x, y):
+        return self.tiles[x][y].is_floor()
     
     def get_tile(self, x, y)->Tile:
         return self.tiles[x][y]
+
+    def set_tile_type(self, x, y, tile_type: TileType):
+        old_type = self.tiles[x][y].type
+        self.tiles[x][y].type = tile_type
+        self.changed_tiles.add((x, y))
+        if self.breakable is not None and (old_type in FLOOR_TYPES) != (tile_type in FLOOR_TYPES):
+            self._patch_breakable(x, y)
+        self.version += 1
+        for listener in self.tile_listeners:
+            listener(x, y, old_type, tile_type)
+
+    def pop_changed_tiles(self):
+        changed_tiles = self.changed_tiles
+        self.changed_tiles = set()
+        return changed_tiles
+
+    def pieces_at(self, x, y) -> List[Piece]:
+        return self.tiles[x][y].pieces
+
+    def count_tiles(self, tile_type: TileType) -> int:
+        return sum(sum(1 for tile in row if tile.type == tile_type) for row in self.tiles)
+
+    def tile_codes(self) -> bytes:
+        """Tile types as one TILE_CODES byte per tile, row after row."""
+        return bytes(TILE_CODES[tile.type] for row in self.tiles for tile in row)
+
+    def get_occupied_tiles(self) -> List[Tuple[Tuple[int, int], List[Piece]]]:
+        occupied_tiles = []
+        for x, row in enumerate(self.tiles):
+            for y, tile in enumerate(row):
+                if tile.pieces:
+                    occupied_tiles.append(((x, y), tile.pieces))
+        return occupied_tiles
     
     def get_pieces(self, player: Player, include_ghosts: bool) -> List[Piece]:
         pieces = []
-        for x in range(self.height):
-            for y in range(self.width):
-                for piece in self.tiles[x][y].pieces:
-                    if piece.owner == player.name and (include_ghosts or not piece.is_ghost):
-                        pieces.append(piece)
+        for (owner, _, is_ghost), indexed_pieces in self.piece_index.items():
+            if owner == player.name and (include_ghosts or not is_ghost):
+                pieces.extend(indexed_pieces)
         return pieces
 
+    def find_pieces(self, owner: str, number: int, is_ghost: bool) -> List[Piece]:
+        return list(self.piece_index.get((owner, number, is_ghost), []))
+
+    def add_piece(self, piece: Piece):
+        self.get_tile(piece.position[0], piece.position[1]).pieces.append(piece)
+        self.piece_index.setdefault((piece.owner, piece.number, piece.is_ghost), []).append(piece)
+        self.pieces_version += 1
+
+    def remove_piece(self, piece: Piece):
+        self.get_tile(piece.position[0], piece.position[1]).pieces.remove(piece)
+        self._unindex_piece(piece)
+        self.pieces_version += 1
+
+    def set_ghost(self, piece: Piece, is_ghost: bool):
+        self._unindex_piece(piece)
+        piece.is_ghost = is_ghost
+        self.piece_index.setdefault((piece.owner, piece.number, piece.is_ghost), []).append(piece)
+        self.pieces_version += 1
+
+    def view_key(self):
+        """Changes whenever a tile type, a piece or the gameover flag changes."""
+        return (self.version, self.pieces_version, self.gameover)
+
+    def reindex_pieces(self):
+        self.pieces_version += 1
+        self.piece_index = {}
+        for row in self.tiles:
+            for tile in row:
+                for piece in tile.pieces:
+                    self.piece_index.setdefault((piece.owner, piece.number, piece.is_ghost), []).append(piece)
+
+    def _unindex_piece(self, piece: Piece):
+        key = (piece.owner, piece.number, piece.is_ghost)
+        indexed_pieces = self.piece_index.get(key, [])
+        for i, indexed_piece in enumerate(indexed_pieces):
+            if indexed_piece is piece:
+                del indexed_pieces[i]
+                break
+        if not indexed_pieces:
+            self.piece_index.pop(key, None)
+
     def get_piece(self, x, y):
-        for piece in self.get_tile(x, y).pieces:
+        for piece in self.pieces_at(x, y):
             if not piece.is_ghost:
                 return piece
         return None
@@ -111,9 +227,51 @@ class Board:
                     clear_tiles.add((x, y))
         return clear_tiles
 
+    def get_crowded_tiles(self):
+        crowded_tiles = []
+        for x in range(self.height):
+            for y in range(self.width):
+                if len(self.tiles[x][y].pieces) > 1:
+                    crowded_tiles.append((x, y))
+        return crowded_tiles
+
+    def get_breakable_walls(self):
+        breakable_walls = []
+        for x in range(self.height):
+            for y in range(self.width):
+                if self.tiles[x][y].is_wall() and self.can_break_wall(x, y):
+                    breakable_walls.append((x, y))
+        return breakable_walls
+
+    def get_enclosed_walls(self):
+        enclosed_walls = []
+        for x in range(self.height):
+            for y in range(self.width):
+                if self.tiles[x][y].type == TileType.WALL:
+                    neighbors = self.get_neighbors(x, y, include_diagonals=True)
+                    if all(self.tiles[nx][ny].type in {TileType.WALL, TileType.VOID} for nx, ny in neighbors):
+                        enclosed_walls.append((x, y))
+        return enclosed_walls
+
+    def clear_pieces(self):
+        for row in self.tiles:
+            for tile in row:
+                tile.pieces = []
+        self.piece_index = {}
+        self.pieces_version += 1
+
+    def remove_ghost_pieces(self):
+        for pieces in [pieces for key, pieces in self.piece_index.items() if key[2]]:
+            for piece in pieces:
+                self.get_tile(piece.position[0], piece.position[1]).pieces.remove(piece)
+        self.piece_index = {key: pieces for key, pieces in self.piece_index.items() if not key[2]}
+        self.pieces_version += 1
+
 class PlayerTurn:
-    def __init__(self, player_name):
+    def __init__(self, player_name, turn_number=None):
         self.player_name = player_name
+        # Turn number of the board the actions were planned on
+        self.turn_number = turn_number
         self.pieces_actions = {}
 
     def add_move_action(self, piece, to):
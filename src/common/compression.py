@@ -0,0 +1,107 @@
+import weakref
+import zlib
+from typing import List, Optional
+
+from common.framing import FrameError, MAX_FRAME_SIZE
+
+NO_COMPRESSION = "none"
+ZLIB_COMPRESSION = "zlib"
+
+RAW_MARKER = b"\x00"
+ZLIB_MARKER = b"\x01"
+ZLIB_LEVEL = 6
+
+class CompressionStats:
+    def __init__(self):
+        self.messages = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.last_raw_bytes = 0
+        self.last_wire_bytes = 0
+
+    def record(self, raw_size: int, wire_size: int):
+        self.messages += 1
+        self.raw_bytes += raw_size
+        self.wire_bytes += wire_size
+        self.last_raw_bytes = raw_size
+        self.last_wire_bytes = wire_size
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def stats(self) -> dict:
+        return {"messages": self.messages, "raw_bytes": self.raw_bytes, "wire_bytes": self.wire_bytes, "ratio": round(self.ratio, 2)}
+
+    def __str__(self):
+        return f"last {self.last_raw_bytes} -> {self.last_wire_bytes} bytes, {self.messages} messages {self.raw_bytes} -> {self.wire_bytes} bytes (x{self.ratio:.1f})"
+
+class Compressor:
+    """Marks outgoing messages as uncompressed. Every compressor can read all markers, and
+    unmarked messages (sent before compression was negotiated) are passed through as they are.
+    """
+    name = NO_COMPRESSION
+
+    def __init__(self):
+        self.sent = CompressionStats()
+        self.received = CompressionStats()
+        self.decompressor = None
+
+    def compress(self, payload: bytes) -> bytes:
+        message = RAW_MARKER + payload
+        self.sent.record(len(payload), len(message))
+        return message
+
+    def decompress(self, message: bytes) -> bytes:
+        marker = message[:1]
+        if marker == RAW_MARKER:
+            payload = message[1:]
+        elif marker == ZLIB_MARKER:
+            if self.decompressor is None:
+                self.decompressor = zlib.decompressobj()
+            payload = self.decompressor.decompress(message[1:], MAX_FRAME_SIZE)
+            if self.decompressor.unconsumed_tail:
+                raise FrameError(f"Decompressed message is over the {MAX_FRAME_SIZE} bytes limit")
+        else:
+            payload = message
+        self.received.record(len(payload), len(message))
+        return payload
+
+class ZlibCompressor(Compressor):
+    """Compresses with one zlib stream for the whole connection, so later messages reuse the history of earlier ones."""
+    name = ZLIB_COMPRESSION
+
+    def __init__(self, level=ZLIB_LEVEL):
+        super().__init__()
+        self.compressor = zlib.compressobj(level)
+
+    def compress(self, payload: bytes) -> bytes:
+        message = ZLIB_MARKER + self.compressor.compress(payload) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.sent.record(len(payload), len(message))
+        return message
+
+COMPRESSORS = {compressor.name: compressor for compressor in [ZlibCompressor, Compressor]}
+SUPPORTED_COMPRESSION = list(COMPRESSORS)
+
+def choose_compression(offered: List[str]) -> str:
+    for name in offered:
+        if name in COMPRESSORS:
+            return name
+    return NO_COMPRESSION
+
+_compressors = weakref.WeakKeyDictionary()
+
+def set_compression(conn, name: str) -> Compressor:
+    compressor = _compressors[conn] = COMPRESSORS.get(name, Compressor)()
+    return compressor
+
+def get_compressor(conn) -> Optional[Compressor]:
+    return _compressors.get(conn)
+
+def compress_message(conn, payload: bytes) -> bytes:
+    compressor = _compressors.get(conn)
+    return compressor.compress(payload) if compressor else payload
+
+def decompress_message(conn, message: bytes) -> bytes:
+    compressor = _compressors.get(conn)
+    return compressor.decompress(message) if compressor else message
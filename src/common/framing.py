@@ -0,0 +1,94 @@
+import struct
+import weakref
+from typing import List, Optional
+
+HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+RECV_SIZE = 64 * 1024
+
+class FrameError(Exception):
+    pass
+
+def encode_frame(payload: bytes) -> bytes:
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FrameError(f"Frame of {len(payload)} bytes is over the {MAX_FRAME_SIZE} bytes limit")
+    return HEADER.pack(len(payload)) + payload
+
+class FrameReader:
+    """Reassembles length prefixed frames out of a byte stream.
+
+    Received data goes through one fixed size chunk, the buffer only ever holds the
+    frame being assembled and anything that arrived after it.
+    """
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray()
+        self.chunk = memoryview(bytearray(RECV_SIZE))
+
+    def feed(self, data):
+        self.buffer += data
+
+    def next_frame(self) -> Optional[bytes]:
+        if len(self.buffer) < HEADER.size:
+            return None
+        size = HEADER.unpack_from(self.buffer)[0]
+        if size > self.max_frame_size:
+            raise FrameError(f"Frame of {size} bytes is over the {self.max_frame_size} bytes limit")
+        end = HEADER.size + size
+        if len(self.buffer) < end:
+            return None
+        frame = bytes(self.buffer[HEADER.size:end])
+        del self.buffer[:end]
+        return frame
+
+    def read_frame(self, conn) -> Optional[bytes]:
+        """Blocks until a whole frame is available, returns None if the connection closed."""
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            received = conn.recv_into(self.chunk)
+            if received == 0:
+                return None
+            self.feed(self.chunk[:received])
+
+    def read_available(self, conn) -> Optional[List[bytes]]:
+        """Reads once from `conn` and returns the frames completed so far, None if the connection closed.
+
+        Meant for a connection select() reported readable, the read then does not block. A frame
+        that is not complete yet stays buffered until the rest of it arrives.
+        """
+        received = conn.recv_into(self.chunk)
+        if received == 0:
+            return None
+        self.feed(self.chunk[:received])
+        frames = []
+        frame = self.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.next_frame()
+        return frames
+
+_readers = weakref.WeakKeyDictionary()
+
+def get_reader(conn) -> FrameReader:
+    reader = _readers.get(conn)
+    if reader is None:
+        reader = _readers[conn] = FrameReader()
+    return reader
+
+def send_frame(conn, payload: bytes):
+    conn.sendall(encode_frame(payload))
+
+def receive_frame(conn, timeout=None) -> Optional[bytes]:
+    conn.settimeout(timeout)
+    return get_reader(conn).read_frame(conn)
+
+def receive_available_frames(conn) -> Optional[List[bytes]]:
+    return get_reader(conn).read_available(conn)
+
+def has_buffered_frame(conn) -> bool:
+    reader = _readers.get(conn)
+    if reader is None or len(reader.buffer) < HEADER.size:
+        return False
+    return len(reader.buffer) >= HEADER.size + HEADER.unpack_from(reader.buffer)[0]
@@ -0,0 +1,215 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+from common.base_classes import Board, Piece, Tile, TileType, TILE_TYPES, TILE_CODES, FLOOR_TYPES, WALL_TYPES, FOG_TYPES, fog_type
+
+# Lookup tables indexed by tile code
+IS_FLOOR = np.array([tile_type in FLOOR_TYPES for tile_type in TILE_TYPES], dtype=bool)
+IS_WALL = np.array([tile_type in WALL_TYPES for tile_type in TILE_TYPES], dtype=bool)
+IS_CLEAR = np.array([tile_type not in FOG_TYPES for tile_type in TILE_TYPES], dtype=bool)
+FLOOR_CODES = IS_FLOOR.tolist()
+FOG_CODES = np.array([TILE_CODES[fog_type(tile_type)] for tile_type in TILE_TYPES], dtype=np.uint8)
+
+WALL = TILE_CODES[TileType.WALL]
+VOID = TILE_CODES[TileType.VOID]
+
+class GridTile(Tile):
+    """View of a single tile of a GridBoard, reads and writes go through the board.
+
+    `pieces` of an empty tile is an empty tuple: reading a tile never adds it to the
+    board's piece map, pieces are added with GridBoard.add_piece.
+    """
+    def __init__(self, board: 'GridBoard', x: int, y: int):
+        self.board = board
+        self.x = x
+        self.y = y
+
+    @property
+    def type(self) -> TileType:
+        return TILE_TYPES[self.board.grid.item(self.x, self.y)]
+
+    @type.setter
+    def type(self, tile_type: TileType):
+        self.board.set_tile_type(self.x, self.y, tile_type)
+
+    @property
+    def pieces(self) -> Sequence[Piece]:
+        return self.board.tile_pieces.get((self.x, self.y), ())
+
+    @pieces.setter
+    def pieces(self, pieces: List[Piece]):
+        if pieces:
+            self.board.tile_pieces[(self.x, self.y)] = pieces
+        else:
+            self.board.tile_pieces.pop((self.x, self.y), None)
+
+class GridRow:
+    def __init__(self, board: 'GridBoard', x: int):
+        self.board = board
+        self.x = x
+
+    def __len__(self):
+        return self.board.width
+
+    def __getitem__(self, y) -> GridTile:
+        if y < 0 or y >= self.board.width:
+            raise IndexError(y)
+        return GridTile(self.board, self.x, y)
+
+    def __iter__(self):
+        for y in range(self.board.width):
+            yield GridTile(self.board, self.x, y)
+
+class GridRows:
+    def __init__(self, board: 'GridBoard'):
+        self.board = board
+
+    def __len__(self):
+        return self.board.height
+
+    def __getitem__(self, x) -> GridRow:
+        if x < 0 or x >= self.board.height:
+            raise IndexError(x)
+        return GridRow(self.board, x)
+
+    def __iter__(self):
+        for x in range(self.board.height):
+            yield GridRow(self.board, x)
+
+class GridBoard(Board):
+    """Board storing tile types as a uint8 grid and pieces in a sparse map.
+
+    `tiles` and `get_tile` return views so code written against Board keeps working,
+    while the full-board passes below run as array operations.
+    """
+    def __init__(self, width: int, height: int, base_tile_type: TileType):
+        self.grid = np.full((height, width), TILE_CODES[base_tile_type], dtype=np.uint8)
+        self.tile_pieces: Dict[Tuple[int, int], List[Piece]] = {}
+        self.width = width
+        self.height = height
+        self.gameover = False
+        self.turn_number = 0
+        self.piece_index: Dict[Tuple[str, int, bool], List[Piece]] = {}
+        self.changed_tiles = set()
+        self.breakable = None
+        self.version = 0
+        self.pieces_version = 0
+        self.tile_listeners = []
+
+    @property
+    def tiles(self) -> GridRows:
+        return GridRows(self)
+
+    def get_tile(self, x, y) -> GridTile:
+        return GridTile(self, x, y)
+
+    def set_tile_type(self, x, y, tile_type: TileType):
+        old_type = TILE_TYPES[self.grid.item(x, y)]
+        self.grid[x, y] = TILE_CODES[tile_type]
+        self.changed_tiles.add((x, y))
+        if self.breakable is not None and (old_type in FLOOR_TYPES) != (tile_type in FLOOR_TYPES):
+            self._patch_breakable(x, y)
+        self.version += 1
+        for listener in self.tile_listeners:
+            listener(x, y, old_type, tile_type)
+
+    def compute_breakable(self):
+        floor = np.pad(IS_FLOOR[self.grid], 1, constant_values=False)
+        blocked = np.zeros((self.height, self.width), dtype=bool)
+        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+            side_x = floor[1 + dx:1 + dx + self.height, 1:1 + self.width]
+            side_y = floor[1:1 + self.height, 1 + dy:1 + dy + self.width]
+            corner = floor[1 + dx:1 + dx + self.height, 1 + dy:1 + dy + self.width]
+            blocked |= side_x & side_y & corner
+        breakable = ~blocked
+        breakable[[0, -1], :] = False
+        breakable[:, [0, -1]] = False
+        return breakable
+
+    def _patch_breakable(self, x, y):
+        x0, y0 = max(0, x - 2), max(0, y - 2)
+        floor = IS_FLOOR[self.grid[x0:x + 3, y0:y + 3]].tolist()
+        for nx in range(max(1, x - 1), min(self.height - 1, x + 2)):
+            up, row, down = floor[nx - 1 - x0], floor[nx - x0], floor[nx + 1 - x0]
+            for ny in range(max(1, y - 1), min(self.width - 1, y + 2)):
+                j = ny - y0
+                self.breakable[nx, ny] = not (
+                    (up[j] and row[j - 1] and up[j - 1]) or
+                    (up[j] and row[j + 1] and up[j + 1]) or
+                    (down[j] and row[j - 1] and down[j - 1]) or
+                    (down[j] and row[j + 1] and down[j + 1]))
+
+    def is_floor(self, x, y):
+        return FLOOR_CODES[self.grid.item(x, y)]
+
+    def pieces_at(self, x, y) -> Sequence[Piece]:
+        return self.tile_pieces.get((x, y), ())
+
+    def count_tiles(self, tile_type: TileType) -> int:
+        return int(np.count_nonzero(self.grid == TILE_CODES[tile_type]))
+
+    def tile_codes(self) -> bytes:
+        return self.grid.tobytes()
+
+    def get_occupied_tiles(self):
+        return [(position, pieces) for position, pieces in self.tile_pieces.items() if pieces]
+
+    def get_clear_vision(self):
+        return {(int(x), int(y)) for x, y in np.argwhere(IS_CLEAR[self.grid])}
+
+    def get_crowded_tiles(self):
+        return [position for position, pieces in self.tile_pieces.items() if len(pieces) > 1]
+
+    def write_codes(self, mask: np.ndarray, codes: np.ndarray):
+        """Sets the tiles in `mask` to `codes`, the version only moves when a tile type changed."""
+        if not (self.grid[mask] != codes).any():
+            return
+        self.grid[mask] = codes
+        self.breakable = None
+        self.version += 1
+
+    def get_enclosed_walls(self):
+        # Out of bounds neighbours count as walls, same as Board.get_enclosed_walls skipping them
+        solid = np.pad((self.grid == WALL) | (self.grid == VOID), 1, constant_values=True)
+        enclosed = self.grid == WALL
+        for dx in range(3):
+            for dy in range(3):
+                enclosed &= solid[dx:dx + self.height, dy:dy + self.width]
+        return [(int(x), int(y)) for x, y in np.argwhere(enclosed)]
+
+    def add_piece(self, piece: Piece):
+        x, y = piece.position
+        self.tile_pieces.setdefault((x, y), []).append(piece)
+        self.piece_index.setdefault((piece.owner, piece.number, piece.is_ghost), []).append(piece)
+        self.pieces_version += 1
+
+    def remove_piece(self, piece: Piece):
+        x, y = piece.position
+        pieces = self.tile_pieces[(x, y)]
+        pieces.remove(piece)
+        if not pieces:
+            del self.tile_pieces[(x, y)]
+        self._unindex_piece(piece)
+        self.pieces_version += 1
+
+    def reindex_pieces(self):
+        self.pieces_version += 1
+        self.piece_index = {}
+        for pieces in self.tile_pieces.values():
+            for piece in pieces:
+                self.piece_index.setdefault((piece.owner, piece.number, piece.is_ghost), []).append(piece)
+
+    def clear_pieces(self):
+        self.tile_pieces = {}
+        self.piece_index = {}
+        self.pieces_version += 1
+
+    def remove_ghost_pieces(self):
+        tile_pieces = {}
+        for position, pieces in self.tile_pieces.items():
+            pieces = [p for p in pieces if not p.is_ghost]
+            if pieces:
+                tile_pieces[position] = pieces
+        self.tile_pieces = tile_pieces
+        self.piece_index = {key: pieces for key, pieces in self.piece_index.items() if not key[2]}
+        self.pieces_version += 1
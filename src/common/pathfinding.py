@@ -0,0 +1,140 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.base_classes import Board, FLOOR_TYPES
+
+UNREACHABLE = -1
+MAX_CACHED_FIELDS = 64
+
+class PathFinder:
+    """Breadth first distance fields over the floor tiles of a board, cached per source.
+
+    The finder listens to Board.set_tile_type. A wall turning into floor only relaxes the
+    distances around it, a floor tile closing drops the fields that went through it and
+    bulk writes that bypass set_tile_type drop every field.
+    """
+    def __init__(self, board: Board):
+        self.board = board
+        self.fields: Dict[Tuple[int, int], List[int]] = {}
+        self.version = board.version
+        self.pending = []
+        board.tile_listeners.append(self.on_tile_changed)
+
+    def detach(self):
+        self.board.tile_listeners.remove(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y, old_type, new_type):
+        self.pending.append((x, y, old_type in FLOOR_TYPES, new_type in FLOOR_TYPES))
+
+    def distance_field(self, source: Tuple[int, int]) -> List[int]:
+        """Distances from `source` to every tile, indexed by x * width + y."""
+        self._sync()
+        source = tuple(source)
+        field = self.fields.pop(source, None)
+        if field is None:
+            field = self._compute_field(source)
+            if len(self.fields) >= MAX_CACHED_FIELDS:
+                del self.fields[next(iter(self.fields))]
+        self.fields[source] = field
+        return field
+
+    def distance(self, a: Tuple[int, int], b: Tuple[int, int]) -> int:
+        """Number of moves between `a` and `b`, UNREACHABLE if there is no floor path."""
+        self._sync()
+        # Distances are only symmetric between floor tiles: the field of a wall source reaches out of it
+        if tuple(a) in self.fields and tuple(b) not in self.fields and self.board.is_floor(*a) and self.board.is_floor(*b):
+            a, b = b, a
+        return self.distance_field(b)[a[0] * self.board.width + a[1]]
+
+    def next_step(self, position: Tuple[int, int], target: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Neighbour of `position` one move closer to `target`, None when already there or unreachable."""
+        field = self.distance_field(target)
+        distance = field[position[0] * self.board.width + position[1]]
+        if distance <= 0:
+            return None
+        for nx, ny in self.board.get_neighbors(position[0], position[1]):
+            if field[nx * self.board.width + ny] == distance - 1:
+                return (nx, ny)
+        return None
+
+    def nearest(self, position: Tuple[int, int], targets: Iterable[Tuple[int, int]]) -> Tuple[Optional[Tuple[int, int]], int]:
+        best, best_distance = None, UNREACHABLE
+        for target in targets:
+            distance = self.distance(position, target)
+            if distance != UNREACHABLE and (best is None or distance < best_distance):
+                best, best_distance = tuple(target), distance
+        return best, best_distance
+
+    def _compute_field(self, source: Tuple[int, int]) -> List[int]:
+        width = self.board.width
+        field = [UNREACHABLE] * (width * self.board.height)
+        field[source[0] * width + source[1]] = 0
+        self._relax(field, deque([source]))
+        return field
+
+    def _relax(self, field: List[int], queue: deque):
+        width = self.board.width
+        while queue:
+            x, y = queue.popleft()
+            distance = field[x * width + y] + 1
+            for nx, ny in self.board.get_neighbors(x, y):
+                i = nx * width + ny
+                if (field[i] == UNREACHABLE or field[i] > distance) and self.board.is_floor(nx, ny):
+                    field[i] = distance
+                    queue.append((nx, ny))
+
+    def _sync(self):
+        if self.board.version - self.version != len(self.pending):
+            # Tiles changed without going through set_tile_type
+            self.fields = {}
+        else:
+            for x, y, was_floor, is_floor in self.pending:
+                if was_floor == is_floor:
+                    continue
+                if is_floor:
+                    self._opened(x, y)
+                else:
+                    self._closed(x, y)
+        self.pending = []
+        self.version = self.board.version
+
+    def _opened(self, x, y):
+        width = self.board.width
+        i = x * width + y
+        for field in self.fields.values():
+            reachable = [field[nx * width + ny] for nx, ny in self.board.get_neighbors(x, y) if field[nx * width + ny] != UNREACHABLE]
+            if not reachable:
+                continue
+            if field[i] == UNREACHABLE or min(reachable) + 1 < field[i]:
+                field[i] = min(reachable) + 1
+                self._relax(field, deque([(x, y)]))
+
+    def _closed(self, x, y):
+        # Fields that reached the tile went through it, the field of the tile itself included
+        i = x * self.board.width + y
+        self.fields = {source: field for source, field in self.fields.items() if field[i] == UNREACHABLE}
+
+def check_reachability(board: Board, spawns: Iterable[Tuple[int, int]], exits: Iterable[Tuple[int, int]], finder: PathFinder = None) -> Dict[Tuple[int, int], int]:
+    """Distance from every spawn to its nearest exit, UNREACHABLE when it has none. Used to tell if a map is playable and fair."""
+    own_finder = finder is None
+    finder = finder or PathFinder(board)
+    exits = list(exits)
+    distances = {}
+    for spawn in spawns:
+        field = finder.distance_field(spawn)
+        exit_distances = [field[x * board.width + y] for x, y in exits]
+        distances[tuple(spawn)] = min((distance for distance in exit_distances if distance != UNREACHABLE), default = UNREACHABLE)
+    if own_finder:
+        finder.detach()
+    return distances
+
+def is_playable(board: Board, spawns: Iterable[Tuple[int, int]], exits: Iterable[Tuple[int, int]]) -> bool:
+    """Every spawn can reach an exit and every other spawn."""
+    spawns = [tuple(spawn) for spawn in spawns]
+    if not spawns:
+        return False
+    finder = PathFinder(board)
+    distances = check_reachability(board, spawns, exits, finder)
+    connected = all(finder.distance(spawns[0], spawn) != UNREACHABLE for spawn in spawns)
+    finder.detach()
+    return connected and UNREACHABLE not in distances.values()
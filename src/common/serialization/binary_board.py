@@ -0,0 +1,116 @@
+import struct
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from common.base_classes import Board, Piece, Tile, TILE_TYPES
+from common.serialization.serialize_board import load_board_json
+
+MAGIC = b"BRD1"
+
+GAMEOVER = 1
+RUN_LENGTH = 2
+
+# magic, width, height, flags, turn number, tile data size, player count, piece count
+HEADER = struct.Struct("!4sHHBIIHI")
+PLAYER = struct.Struct("!H3B")
+# x, y, number, player index, is_ghost
+PIECE = struct.Struct("!HHHHB")
+MAX_RUN = 255
+
+def run_length_encode(codes: bytes) -> bytes:
+    encoded = bytearray()
+    for code, run in groupby(codes):
+        length = sum(1 for _ in run)
+        while length > 0:
+            encoded += bytes((min(length, MAX_RUN), code))
+            length -= MAX_RUN
+    return bytes(encoded)
+
+def run_length_decode(encoded: bytes) -> bytes:
+    codes = bytearray()
+    for i in range(0, len(encoded), 2):
+        codes += encoded[i + 1:i + 2] * encoded[i]
+    return bytes(codes)
+
+def player_table_size(names: List[bytes]) -> int:
+    return len(names) * PLAYER.size + sum(len(name) for name in names)
+
+def pack_players(buffer: bytearray, offset: int, names: List[bytes], colors: List[tuple]) -> int:
+    for name, color in zip(names, colors):
+        PLAYER.pack_into(buffer, offset, len(name), *color)
+        offset += PLAYER.size
+        buffer[offset:offset + len(name)] = name
+        offset += len(name)
+    return offset
+
+def unpack_players(data: bytes, offset: int, count: int) -> Tuple[List[Tuple[str, tuple]], int]:
+    players = []
+    for _ in range(count):
+        name_size, *color = PLAYER.unpack_from(data, offset)
+        offset += PLAYER.size
+        players.append((data[offset:offset + name_size].decode(), tuple(color)))
+        offset += name_size
+    return players, offset
+
+def encode_board(board: Board) -> bytes:
+    """Packs `board` as a header, one byte per tile (run length encoded when shorter), a player table and a piece table.
+
+    Pieces reference their (owner, color) pair by index in the player table instead of repeating it.
+    """
+    flags = GAMEOVER if board.gameover else 0
+    tile_data = board.tile_codes()
+    encoded_tiles = run_length_encode(tile_data)
+    if len(encoded_tiles) < len(tile_data):
+        tile_data = encoded_tiles
+        flags |= RUN_LENGTH
+
+    players: Dict[Tuple[str, tuple], int] = {}
+    pieces = []
+    for (x, y), tile_pieces in board.get_occupied_tiles():
+        for piece in tile_pieces:
+            index = players.setdefault((piece.owner, tuple(piece.color)), len(players))
+            pieces.append((x, y, piece.number, index, piece.is_ghost))
+    names = [owner.encode() for owner, _ in players]
+
+    size = HEADER.size + len(tile_data) + player_table_size(names) + len(pieces) * PIECE.size
+    buffer = bytearray(size)
+    HEADER.pack_into(buffer, 0, MAGIC, board.width, board.height, flags, board.turn_number, len(tile_data), len(players), len(pieces))
+    offset = HEADER.size
+    buffer[offset:offset + len(tile_data)] = tile_data
+    offset += len(tile_data)
+    offset = pack_players(buffer, offset, names, [color for _, color in players])
+
+    for piece in pieces:
+        PIECE.pack_into(buffer, offset, *piece)
+        offset += PIECE.size
+
+    return bytes(buffer)
+
+def decode_board(data: bytes) -> Board:
+    magic, width, height, flags, turn_number, tile_size, player_count, piece_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary board")
+    offset = HEADER.size
+    tile_data = data[offset:offset + tile_size]
+    offset += tile_size
+    if flags & RUN_LENGTH:
+        tile_data = run_length_decode(tile_data)
+
+    tiles = [[Tile(TILE_TYPES[code]) for code in tile_data[x * width:(x + 1) * width]] for x in range(height)]
+    board = Board(width, height, None, tiles)
+    board.gameover = bool(flags & GAMEOVER)
+    board.turn_number = turn_number
+
+    players, offset = unpack_players(data, offset, player_count)
+    for x, y, number, index, is_ghost in PIECE.iter_unpack(data[offset:offset + piece_count * PIECE.size]):
+        owner, color = players[index]
+        tiles[x][y].pieces.append(Piece(number, (x, y), owner, bool(is_ghost), color))
+
+    board.reindex_pieces()
+    return board
+
+def load_board(data: bytes) -> Board:
+    """Decodes a board sent either with encode_board or as BoardEncoder JSON."""
+    if data[:len(MAGIC)] == MAGIC:
+        return decode_board(data)
+    return load_board_json(data)
@@ -0,0 +1,246 @@
+import itertools
+import struct
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from common.base_classes import Board, Piece, Tile, TILE_TYPES
+from common.serialization.binary_board import HEADER, GAMEOVER, encode_board, load_board, player_table_size, pack_players, unpack_players
+
+DELTA_MAGIC = b"BRDD"
+KEYFRAME_INTERVAL = 20
+
+# tile index, tile code
+TILE_CHANGE = struct.Struct("!IB")
+# x, y, piece count
+PIECE_TILE = struct.Struct("!HHH")
+# number, player index, is_ghost
+DELTA_PIECE = struct.Struct("!HHB")
+COMPARE_CHUNK = 256
+# Keys of the board states taken by every ViewCache, deltas are keyed by the state they start from
+_state_keys = itertools.count()
+
+PieceRecord = Tuple[int, str, tuple, bool]
+
+def piece_records(board: Board) -> Dict[Tuple[int, int], Tuple[PieceRecord, ...]]:
+    return {tuple(position): tuple((piece.number, piece.owner, tuple(piece.color), piece.is_ghost) for piece in pieces)
+            for position, pieces in board.get_occupied_tiles()}
+
+def changed_indices(old: bytes, new: bytes) -> List[int]:
+    """Indices where `old` and `new` differ, only scanning the chunks that do not compare equal."""
+    indices = []
+    for start in range(0, len(new), COMPARE_CHUNK):
+        end = start + COMPARE_CHUNK
+        if old[start:end] != new[start:end]:
+            indices.extend(i for i in range(start, min(end, len(new))) if old[i] != new[i])
+    return indices
+
+class BoardState:
+    """Tile codes and pieces of a board at the time it was sent, the base the next delta applies to."""
+    def __init__(self, width: int, height: int, codes: bytes, pieces: Dict[Tuple[int, int], Tuple[PieceRecord, ...]], turn_number=0):
+        self.width = width
+        self.height = height
+        self.codes = bytearray(codes)
+        self.pieces = pieces
+        self.turn_number = turn_number
+
+    @classmethod
+    def of(cls, board: Board) -> 'BoardState':
+        return cls(board.width, board.height, board.tile_codes(), piece_records(board), board.turn_number)
+
+    def to_board(self) -> Board:
+        width = self.width
+        tiles = [[Tile(TILE_TYPES[code]) for code in self.codes[x * width:(x + 1) * width]] for x in range(self.height)]
+        for (x, y), records in self.pieces.items():
+            tiles[x][y].pieces = [Piece(number, (x, y), owner, is_ghost, color) for number, owner, color, is_ghost in records]
+        board = Board(width, self.height, None, tiles)
+        board.turn_number = self.turn_number
+        board.reindex_pieces()
+        return board
+
+def encode_delta(old: BoardState, new: BoardState, gameover: bool) -> bytes:
+    """Packs the tiles whose type changed and the full piece list of every tile whose pieces changed."""
+    tiles = changed_indices(old.codes, new.codes)
+    positions = [position for position in old.pieces.keys() | new.pieces.keys() if old.pieces.get(position) != new.pieces.get(position)]
+
+    players: Dict[Tuple[str, tuple], int] = {}
+    for position in positions:
+        for _, owner, color, _ in new.pieces.get(position, ()):
+            players.setdefault((owner, color), len(players))
+    names = [owner.encode() for owner, _ in players]
+    piece_count = sum(len(new.pieces.get(position, ())) for position in positions)
+
+    size = HEADER.size + len(tiles) * TILE_CHANGE.size + player_table_size(names) + len(positions) * PIECE_TILE.size + piece_count * DELTA_PIECE.size
+    buffer = bytearray(size)
+    HEADER.pack_into(buffer, 0, DELTA_MAGIC, new.width, new.height, GAMEOVER if gameover else 0, new.turn_number, len(tiles), len(players), len(positions))
+    offset = HEADER.size
+    for i in tiles:
+        TILE_CHANGE.pack_into(buffer, offset, i, new.codes[i])
+        offset += TILE_CHANGE.size
+    offset = pack_players(buffer, offset, names, [color for _, color in players])
+
+    for x, y in positions:
+        records = new.pieces.get((x, y), ())
+        PIECE_TILE.pack_into(buffer, offset, x, y, len(records))
+        offset += PIECE_TILE.size
+        for number, owner, color, is_ghost in records:
+            DELTA_PIECE.pack_into(buffer, offset, number, players[(owner, color)], is_ghost)
+            offset += DELTA_PIECE.size
+
+    return bytes(buffer)
+
+def is_delta(data: bytes) -> bool:
+    return data[:len(DELTA_MAGIC)] == DELTA_MAGIC
+
+class ViewCache:
+    """Encoded forms of one board view, shared by every DeltaEncoder that sends that view.
+
+    Entries are keyed by the board and its view_key(): a view that did not change is neither snapshotted
+    nor encoded again, and connections sharing a base get the very same delta bytes. A view that did
+    not change during a turn keeps its snapshot but is encoded again, the bytes carry the turn number.
+    """
+    def __init__(self):
+        self.board = None
+        self.view_key = None
+        self.key = None
+        self.state = None
+        self.keyframe = None
+        self.deltas = {}
+        self.hits = 0
+        self.misses = 0
+
+    def refresh(self, board: Board):
+        view_key = board.view_key()
+        if board is not self.board or view_key != self.view_key:
+            self.board = board
+            self.view_key = view_key
+            self.key = next(_state_keys)
+            self.state = BoardState.of(board)
+            self.keyframe = None
+            self.deltas = {}
+        elif board.turn_number != self.state.turn_number:
+            self.state.turn_number = board.turn_number
+            self.keyframe = None
+            self.deltas = {}
+
+    def get_keyframe(self, board: Board) -> bytes:
+        if self.keyframe is None:
+            self.misses += 1
+            self.keyframe = encode_board(board)
+        else:
+            self.hits += 1
+        return self.keyframe
+
+    def get_delta(self, base_key, base: BoardState, gameover: bool) -> bytes:
+        delta = self.deltas.get(base_key)
+        if delta is None:
+            self.misses += 1
+            delta = self.deltas[base_key] = encode_delta(base, self.state, gameover)
+        else:
+            self.hits += 1
+        return delta
+
+class DeltaEncoder:
+    """Server side of one connection, sends the changes since the last board sent and a full keyframe every `keyframe_interval` boards."""
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL, cache: ViewCache = None):
+        self.keyframe_interval = keyframe_interval
+        self.cache = cache or ViewCache()
+        self.key = None
+        self.state = None
+        self.since_keyframe = 0
+
+    def request_keyframe(self):
+        self.state = None
+
+    def encode(self, board: Board) -> bytes:
+        self.cache.refresh(board)
+        old_key, old = self.key, self.state
+        self.key, self.state = self.cache.key, self.cache.state
+        if old is None or (old.width, old.height) != (self.state.width, self.state.height) or self.since_keyframe >= self.keyframe_interval:
+            self.since_keyframe = 0
+            return self.cache.get_keyframe(board)
+        self.since_keyframe += 1
+        return self.cache.get_delta(old_key, old, board.gameover)
+
+class StreamEncoder:
+    """Encodes one view for many receivers: each board as a delta from the board before it and, when asked, as a keyframe.
+
+    Receivers that got the previous board apply the delta, the others wait for a keyframe.
+    """
+    def __init__(self):
+        self.cache = ViewCache()
+        self.key = None
+        self.state = None
+
+    def encode(self, board: Board, keyframe=False) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Returns (keyframe or None, delta or None), there is no delta for the first board or after a size change."""
+        self.cache.refresh(board)
+        old_key, old = self.key, self.state
+        self.key, self.state = self.cache.key, self.cache.state
+        delta = None
+        if old is not None and (old.width, old.height) == (self.state.width, self.state.height):
+            delta = self.cache.get_delta(old_key, old, board.gameover)
+        return (self.cache.get_keyframe(board) if keyframe or delta is None else None), delta
+
+class DeltaDecoder:
+    """Client side of one connection, keeps the base state the server's deltas apply to.
+
+    update() moves the base state to a new message, patch() then brings a local board to
+    the base state in place. Tiles and pieces the client changed locally since are put back
+    to the server's view as well, the delta only covers what changed on the server.
+    """
+    def __init__(self):
+        self.state = None
+
+    def update(self, data: bytes) -> Tuple[Optional[Board], Set[Tuple[int, int]], bool]:
+        """Moves the base state to `data`, returns the decoded board for a keyframe or the tiles changed by a delta, and the gameover flag."""
+        if not is_delta(data):
+            board = load_board(data)
+            self.state = BoardState.of(board)
+            return board, set(), board.gameover
+
+        _, width, height, flags, turn_number, tile_count, player_count, position_count = HEADER.unpack_from(data)
+        if self.state is None or (self.state.width, self.state.height) != (width, height):
+            raise ValueError("Received a board delta without a matching keyframe")
+
+        self.state.turn_number = turn_number
+        offset = HEADER.size
+        changed_tiles = set()
+        for i, code in TILE_CHANGE.iter_unpack(data[offset:offset + tile_count * TILE_CHANGE.size]):
+            self.state.codes[i] = code
+            changed_tiles.add(divmod(i, width))
+        offset += tile_count * TILE_CHANGE.size
+
+        players, offset = unpack_players(data, offset, player_count)
+        for _ in range(position_count):
+            x, y, count = PIECE_TILE.unpack_from(data, offset)
+            offset += PIECE_TILE.size
+            records = []
+            for number, index, is_ghost in DELTA_PIECE.iter_unpack(data[offset:offset + count * DELTA_PIECE.size]):
+                owner, color = players[index]
+                records.append((number, owner, color, bool(is_ghost)))
+            offset += count * DELTA_PIECE.size
+            if records:
+                self.state.pieces[(x, y)] = tuple(records)
+            else:
+                self.state.pieces.pop((x, y), None)
+        return None, changed_tiles, bool(flags & GAMEOVER)
+
+    def patch(self, board: Board, stale_tiles: Iterable[Tuple[int, int]], gameover: bool):
+        """Brings `board` to the base state in place, given the tiles whose type it missed."""
+        width = self.state.width
+        for x, y in set(stale_tiles) | board.pop_changed_tiles():
+            tile_type = TILE_TYPES[self.state.codes[x * width + y]]
+            if board.get_tile(x, y).type != tile_type:
+                board.set_tile_type(x, y, tile_type)
+        board.pop_changed_tiles()
+
+        local = piece_records(board)
+        for position in local.keys() | self.state.pieces.keys():
+            records = self.state.pieces.get(position, ())
+            if local.get(position, ()) != records:
+                for piece in list(board.pieces_at(position[0], position[1])):
+                    board.remove_piece(piece)
+                for number, owner, color, is_ghost in records:
+                    board.add_piece(Piece(number, position, owner, is_ghost, color))
+
+        board.gameover = gameover
+        board.turn_number = self.state.turn_number
@@ -9,6 +9,7 @@ class BoardEncoder(json.JSONEncoder):
                 "width": obj.width,
                 "height": obj.height,
                 "gameover": obj.gameover,
+                "turn_number": obj.turn_number,
                 "tiles": []
             }
 
@@ -42,8 +43,10 @@ def as_board(dct):
     if dct["class"] == "Board":
         board = Board(dct["width"], dct["height"], TileType.WALL)
         board.gameover = dct["gameover"]
+        board.turn_number = dct.get("turn_number", 0)
 
         board.tiles = dct["tiles"]
+        board.reindex_pieces()
 
         return board
 
@@ -57,3 +60,29 @@ def as_board(dct):
         return Piece(dct["number"], (dct["position"][0], dct["position"][1]), dct["owner"], dct["is_ghost"], dct["color"])
 
     return dct
+
+TILE_VALUES = {tile_type.value: tile_type for tile_type in TileType}
+
+def load_board_json(data) -> Board:
+    """Decodes a BoardEncoder payload without an object_hook.
+
+    The JSON is parsed into plain dicts and lists once, tiles and pieces are then built in a
+    single pass straight into the board, with positions and colors as tuples.
+    """
+    encoded_board = json.loads(data)
+    tiles = []
+    for encoded_row in encoded_board["tiles"]:
+        row = []
+        for encoded_tile in encoded_row:
+            tile = Tile(TILE_VALUES[encoded_tile["type"]])
+            if encoded_tile["pieces"]:
+                tile.pieces = [Piece(piece["number"], tuple(piece["position"]), piece["owner"], piece["is_ghost"], tuple(piece["color"]))
+                               for piece in encoded_tile["pieces"]]
+            row.append(tile)
+        tiles.append(row)
+
+    board = Board(encoded_board["width"], encoded_board["height"], None, tiles)
+    board.gameover = encoded_board["gameover"]
+    board.turn_number = encoded_board.get("turn_number", 0)
+    board.reindex_pieces()
+    return board
@@ -7,6 +7,7 @@ class PlayerTurnEncoder(json.JSONEncoder):
             encoded_turn = {
                 "class": "PlayerTurn",
                 "player_name": obj.player_name,
+                "turn_number": obj.turn_number,
                 "pieces_actions": {}
             }
 
@@ -32,7 +33,7 @@ def as_player_turn(dct):
         return dct
 
     if dct["class"] == "PlayerTurn":
-        player_turn = PlayerTurn(dct["player_name"])
+        player_turn = PlayerTurn(dct["player_name"], dct.get("turn_number"))
         player_turn.pieces_actions = dct["pieces_actions"]
 
         return player_turn
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional
+
+import os
+
+from main import IP_ADDRESS, IP_PORT
+from rooms import RoomManager
+from shards import ShardPool
+
+import sys
+
+sys.path.append("../")
+from common.framing import FrameReader, encode_frame, RECV_SIZE
+from common.compression import compress_message, decompress_message
+
+MAX_PENDING_MESSAGES = 64
+STATS_INTERVAL = 60
+# Worker processes running the games, 0 runs them in the front-end process
+NUM_SHARDS = (os.cpu_count() or 1) - 1
+
+class Connection:
+    """One client, read by its handler task and written by its own writer task.
+
+    Sending only queues the message, a client that does not keep up fills its queue
+    and gets disconnected instead of stalling everyone else.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info("peername")
+        self.frames = FrameReader()
+        self.outgoing = asyncio.Queue(MAX_PENDING_MESSAGES)
+        self.writer_task = asyncio.create_task(self.write_loop())
+
+    def __repr__(self):
+        return f"Connection({self.address})"
+
+    async def read_message(self) -> Optional[bytes]:
+        while True:
+            frame = self.frames.next_frame()
+            if frame is not None:
+                return decompress_message(self, frame)
+            data = await self.reader.read(RECV_SIZE)
+            if not data:
+                return None
+            self.frames.feed(data)
+
+    def pending(self) -> int:
+        return self.outgoing.qsize()
+
+    def send(self, message):
+        if self.writer.is_closing():
+            return
+        payload = message if isinstance(message, bytes) else message.encode()
+        try:
+            self.outgoing.put_nowait(encode_frame(compress_message(self, payload)))
+        except asyncio.QueueFull:
+            print(f"{self} is not keeping up, disconnecting.")
+            self.close()
+
+    async def write_loop(self):
+        try:
+            while True:
+                frame = await self.outgoing.get()
+                if frame is None:
+                    break
+                self.writer.write(frame)
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.writer.close()
+
+    def finish(self):
+        """Closes the connection once the messages already queued are written."""
+        try:
+            self.outgoing.put_nowait(None)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        self.writer_task.cancel()
+        self.writer.close()
+
+async def log_room_stats(room_manager: RoomManager):
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        print(f"Rooms: {room_manager.stats()}")
+
+async def main():
+    shard_pool = ShardPool(NUM_SHARDS) if NUM_SHARDS else None
+    room_manager = RoomManager(shard_pool = shard_pool)
+
+    async def handle_connection(reader, writer):
+        await room_manager.handle_connection(Connection(reader, writer))
+
+    server = await asyncio.start_server(handle_connection, IP_ADDRESS, IP_PORT)
+    print(f"Server listening on {IP_ADDRESS}:{IP_PORT}")
+    stats_task = asyncio.create_task(log_room_stats(room_manager))
+    async with server:
+        await server.serve_forever()
+    stats_task.cancel()
+    if shard_pool:
+        shard_pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
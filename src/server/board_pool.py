@@ -0,0 +1,58 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gen_game import generate_map
+
+POOL_SIZE = 2
+
+class BoardPool:
+    """Keeps maps for the configured (width, height, num_players) generated ahead of time.
+
+    Maps are built in worker processes, taking one queues a replacement, so starting a
+    game only waits on generation when the pool ran dry.
+    """
+    def __init__(self, configs, pool_size=POOL_SIZE, max_workers=None):
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        for config in configs:
+            self.pending[config] = deque()
+            for _ in range(pool_size):
+                self._refill(config)
+
+    def get(self, width, height, num_players):
+        config = (width, height, num_players)
+        queue = self.pending.get(config)
+        if not queue:
+            self.misses += 1
+            return generate_map(width, height, num_players)
+
+        future = next((f for f in queue if f.done()), None)
+        if future is None:
+            # Nothing ready, the oldest request has the biggest head start
+            self.misses += 1
+            future = queue[0]
+        else:
+            self.hits += 1
+        queue.remove(future)
+        self._refill(config)
+
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error generating board: {e}")
+            return generate_map(width, height, num_players)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ready": {config: sum(1 for f in queue if f.done()) for config, queue in self.pending.items()}
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refill(self, config):
+        self.pending[config].append(self.executor.submit(generate_map, *config))
@@ -6,87 +6,60 @@ import sys
 sys.path.append("../")
 from common.base_classes import Board, Player, Piece, TileType
 from common.dto import PlayerInfoDTO
+from common.grid_board import GridBoard
+from common.pathfinding import is_playable
+from map_analysis import MapAnalysis
 from logic import update_player_board
 
 TARGET_FLOOR_PERCENTAGE = 0.35
-
-def mine_board(board: Board):
-    cx, cy = random.randint(0, board.height-1), random.randint(0, board.width-1)
-    board.tiles[cx][cy].type = TileType.FLOOR
+MAX_GENERATION_ATTEMPTS = 10
+CORRIDOR_BIAS = 0.9 # Chance of extending from the newest frontier wall instead of a random one
+MIN_PLACEMENT_DISTANCE = 0 # Manhattan distance kept between any two spawns or exits
+
+def mine_board(board: Board, rng=random, density=TARGET_FLOOR_PERCENTAGE) -> int:
+    """Turns walls into floor until `density` of the board is floor, returns the floor count.
+
+    Walls next to the mined area are kept in a frontier and every tile enters it at most once,
+    so the work is bounded by the board size even when the target can not be reached.
+    """
+    cx, cy = rng.randint(0, board.height-1), rng.randint(0, board.width-1)
+    board.set_tile_type(cx, cy, TileType.FLOOR)
     floor_count = 1
-    target_floor = int(board.height * board.width * TARGET_FLOOR_PERCENTAGE)
-
-    while floor_count < target_floor:
-        directions = board.get_neighbors(cx, cy)
-        valid_wall_moves = []
-        valid_floor_moves = []
-        for nx, ny in directions:
-            if board.tiles[nx][ny].type == TileType.WALL and board.can_break_wall(nx, ny):
-                valid_wall_moves.append((nx, ny))
-            elif board.tiles[nx][ny].type == TileType.FLOOR:
-                valid_floor_moves.append((nx, ny))
-
-        if valid_wall_moves:
-            cx, cy = random.choice(valid_wall_moves)
-            board.tiles[cx][cy].type = TileType.FLOOR
-            floor_count += 1
-        elif valid_floor_moves:
-            cx, cy = random.choice(valid_floor_moves)
-
-
-def set_void_tiles(board: Board):
-    for x in range(board.height):
-        for y in range(board.width):
-            if board.tiles[x][y].type == TileType.WALL:
-                neighbors = board.get_neighbors(x, y, include_diagonals=True)
-                wall_count = sum(1 for nx, ny in neighbors if board.out_of_bounds(nx, ny) or board.tiles[nx][ny].type in {TileType.WALL, TileType.VOID})
-                if wall_count == len(neighbors):
-                    board.tiles[x][y].type = TileType.VOID
-
-def wall_percentage(board: Board):
-    wall_count = sum(sum(1 for tile in row if tile.type == TileType.WALL) for row in board.tiles)
-    total_cells = board.width * board.height
-    return wall_count / total_cells
-
-def setSpawns(board: Board, num_spawns: int) -> List[tuple[int, int]]:
-    potential_spawns = []
-    
-    for x in range(board.height):
-        for y in range(board.width):
-            if board.get_tile(x, y).type == TileType.FLOOR:
-                neighbors = board.get_neighbors(x, y)
-                floor_neighbors = sum(1 for nx, ny in neighbors if board.get_tile(nx, ny).type == TileType.FLOOR)
-                
-                if floor_neighbors == 3:
-                    potential_spawns.append((x, y))
-
-    random.shuffle(potential_spawns)
-    conv_spawns = potential_spawns[:num_spawns]
-
-    for x, y in conv_spawns:
-        board.get_tile(x, y).type = TileType.SPAWN
-    
-    return conv_spawns
-
-def setExits(board: Board, num_exits: int) -> List[tuple[int, int]]:
-    potential_exits = []
-    
-    for x in range(board.height):
-        for y in range(board.width):
-            if board.get_tile(x, y).type == TileType.FLOOR:
-                neighbors = board.get_neighbors(x, y)
-                floor_neighbors = sum(1 for nx, ny in neighbors if board.get_tile(nx, ny).type == TileType.FLOOR)
-                
-                if floor_neighbors == 3:
-                    potential_exits.append((x, y))
-
-    random.shuffle(potential_exits)
-    conv_exits = potential_exits[:num_exits]
-
-    for x, y in conv_exits:
-        board.get_tile(x, y).type = TileType.EXIT
-    
-    return conv_exits
+    target_floor = int(board.height * board.width * density)
+
+    frontier = board.get_neighbors(cx, cy)
+    queued = set(frontier)
+    queued.add((cx, cy))
+
+    while frontier and floor_count < target_floor:
+        if rng.random() >= CORRIDOR_BIAS:
+            i = rng.randrange(len(frontier))
+            frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        x, y = frontier.pop()
+        if board.get_tile(x, y).type != TileType.WALL or not board.can_break_wall(x, y):
+            continue
+
+        board.set_tile_type(x, y, TileType.FLOOR)
+        floor_count += 1
+        for neighbor in board.get_neighbors(x, y):
+            if neighbor not in queued:
+                queued.add(neighbor)
+                frontier.append(neighbor)
+
+    return floor_count
+
+def set_void_tiles(board: Board, analysis: MapAnalysis = None):
+    enclosed_walls = analysis.void_tiles() if analysis else board.get_enclosed_walls()
+    for x, y in enclosed_walls:
+        board.set_tile_type(x, y, TileType.VOID)
+
+def setSpawns(board: Board, num_spawns: int, rng=random, analysis: MapAnalysis = None, min_distance=0) -> List[tuple[int, int]]:
+    analysis = analysis or MapAnalysis(board)
+    return analysis.take(num_spawns, rng, TileType.SPAWN, min_distance)
+
+def setExits(board: Board, num_exits: int, rng=random, analysis: MapAnalysis = None, min_distance=0) -> List[tuple[int, int]]:
+    analysis = analysis or MapAnalysis(board)
+    return analysis.take(num_exits, rng, TileType.EXIT, min_distance)
 
 def spawnStartingPieces(board: Board, player: Player):
     x, y = player.spawn
@@ -94,31 +67,58 @@ def spawnStartingPieces(board: Board, player: Player):
     piece_number = 1
     for nx, ny in neighbors:
         if board.get_tile(nx, ny).type == TileType.FLOOR:
-            board.get_tile(nx, ny).pieces.append(Piece(piece_number, (nx, ny), player.name, False, player.color))
+            board.add_piece(Piece(piece_number, (nx, ny), player.name, False, player.color))
             piece_number += 1
             if piece_number > 3:
                 break
 
-def generate_board(width, height) -> Board:
-    while True:
-        board = Board(width, height, TileType.WALL)
-        mine_board(board)
-        set_void_tiles(board)
-        if wall_percentage(board) > TARGET_FLOOR_PERCENTAGE:
-            return board
-
-def generate_game(player_infos: List[PlayerInfoDTO], width, height):
-    board = generate_board(width, height)
-    spawns = setSpawns(board, len(player_infos))
-    exits = setExits(board, len(player_infos) * 2 + 1)
+def generate_layout(width, height, rng=None, density=TARGET_FLOOR_PERCENTAGE):
+    """Mines boards until one reaches `density` floor, at most MAX_GENERATION_ATTEMPTS times.
+
+    When no attempt reaches it, the attempt with the most floor is returned.
+    """
+    rng = rng or random.Random()
+    target_floor = int(width * height * density)
+    best, best_floor = None, -1
+    for _ in range(MAX_GENERATION_ATTEMPTS):
+        board = GridBoard(width, height, TileType.WALL)
+        floor_count = mine_board(board, rng, density)
+        if floor_count > best_floor:
+            best, best_floor = board, floor_count
+        if floor_count >= target_floor:
+            break
+    else:
+        print(f"No {width}x{height} board reached {density:.0%} floor in {MAX_GENERATION_ATTEMPTS} attempts, using one with {best_floor / (width * height):.0%}.")
+    analysis = MapAnalysis(best)
+    set_void_tiles(best, analysis)
+    return best, analysis
+
+def generate_board(width, height, rng=None, density=TARGET_FLOOR_PERCENTAGE) -> Board:
+    return generate_layout(width, height, rng, density)[0]
+
+def generate_map(width, height, num_players, seed=None, density=TARGET_FLOOR_PERCENTAGE, min_distance=MIN_PLACEMENT_DISTANCE):
+    """Generates boards until one has a spawn for every player, with all spawns connected to each other and to an exit."""
+    rng = random.Random(seed)
+    for _ in range(MAX_GENERATION_ATTEMPTS):
+        board, analysis = generate_layout(width, height, rng, density)
+        spawns = setSpawns(board, num_players, rng, analysis, min_distance)
+        exits = setExits(board, num_players * 2 + 1, rng, analysis, min_distance)
+        if len(spawns) == num_players and is_playable(board, spawns, exits):
+            return board, spawns
+        print(f"Generated {width}x{height} map is not playable for {num_players} players, generating another one.")
+    raise ValueError(f"No playable {width}x{height} map for {num_players} players in {MAX_GENERATION_ATTEMPTS} attempts")
+
+def generate_game(player_infos: List[PlayerInfoDTO], width, height, seed=None, density=TARGET_FLOOR_PERCENTAGE, game_map=None):
+    board, spawns = game_map or generate_map(width, height, len(player_infos), seed, density)
      
     players = []
     for i, player_info in enumerate(player_infos):
         print(f"Generating player {i}, {player_info}")
-        player = Player(player_info.name, player_info.color, board.width, board.height, spawns[i])
+        player = Player(player_info.name, player_info.color, board.width, board.height, spawns[i], GridBoard)
         spawnStartingPieces(board, player)
         players.append(player)
     
+    board.pop_changed_tiles()
     for player in players:
         update_player_board(player, board)
     return board, players
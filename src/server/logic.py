@@ -1,6 +1,7 @@
 import random
 from common.base_classes import Board, Player, TileType, Piece, PlayerTurn, ActionType
 from common.constants import NUMBER_ACTIONS
+from vision import VisionTracker
 
 def move_piece(board: Board, piece: Piece, x: int, y: int, player: Player):
     if not piece:
@@ -28,11 +29,11 @@ def move_piece(board: Board, piece: Piece, x: int, y: int, player: Player):
 
     for p in new_tile.pieces:
         if p.owner == piece.owner and p.is_ghost and p.number == piece.number:
-            p.is_ghost = False
+            board.set_ghost(p, False)
             remove_piece(board, piece)
             return
-    piece.is_ghost = True
-    new_tile.pieces.append(Piece(piece.number, (x, y), piece.owner, False, piece.color))
+    board.set_ghost(piece, True)
+    board.add_piece(Piece(piece.number, (x, y), piece.owner, False, piece.color))
 
 def break_wall(board: Board, piece: Piece, x: int, y: int):
     if not piece or piece.is_ghost:
@@ -41,131 +42,105 @@ def break_wall(board: Board, piece: Piece, x: int, y: int):
     if not board.can_break_wall(x, y):
         return False
 
-    board.get_tile(x, y).type = TileType.FLOOR
+    board.set_tile_type(x, y, TileType.FLOOR)
     return True
 
 def remove_piece(board: Board, piece: Piece):
-    board.get_tile(piece.position[0], piece.position[1]).pieces.remove(piece)
+    board.remove_piece(piece)
 
 def kill_piece(board: Board, piece: Piece):
-    for x in range(board.height):
-        for y in range(board.width):
-            for p in board.get_tile(x, y).pieces:
-                if p.owner == piece.owner and p.number == piece.number:
-                    board.get_tile(x, y).pieces.remove(p)
-
-def clear_vision(player: Player):
-    for x in range(player.board.height):
-        for y in range(player.board.width):
-            if player.board.get_tile(x, y).type == TileType.UNKNOWN:
-                continue
-            if player.board.get_tile(x, y).is_floor():
-                player.board.get_tile(x, y).type = TileType.FOG_FLOOR
-            elif player.board.get_tile(x, y).is_wall():
-                player.board.get_tile(x, y).type = TileType.FOG_WALL
-            else:
-                player.board.get_tile(x, y).type = TileType.FOG_VOID
+    for is_ghost in [False, True]:
+        for p in board.find_pieces(piece.owner, piece.number, is_ghost):
+            board.remove_piece(p)
 
 def clear_pieces(player: Player):
-    for x in range(player.board.height):
-        for y in range(player.board.width):
-            player.board.get_tile(x, y).pieces = []
-
-def get_piece_vision(board: Board, piece: Piece):
-    fog_tiles = set()
-    clear_tiles = set()
-
-    for x in range(piece.position[0] - 4, piece.position[0] + 5):
-        for y in range(piece.position[1] - 4, piece.position[1] + 5):
-            if board.out_of_bounds(x, y):
-                continue
-            fog_tiles.add((x, y))
-    for x in range(piece.position[0] - 2, piece.position[0] + 3):
-        for y in range(piece.position[1] - 2, piece.position[1] + 3):
-            if board.out_of_bounds(x, y):
-                continue
-            clear_tiles.add((x, y))
-
-    return fog_tiles, clear_tiles
+    player.board.clear_pieces()
 
 def update_own_pieces(player: Player, board: Board):
-    clear_pieces(player)
     pieces = board.get_pieces(player, True)
+    if player.board.get_pieces(player, True) == pieces:
+        # Same piece objects as last turn, leave the view (and its pieces_version) alone
+        return
+    clear_pieces(player)
     for piece in pieces:
         print("Added piece.")
-        player.board.get_tile(piece.position[0], piece.position[1]).pieces.append(piece)
-
+        player.board.add_piece(piece)
 
-def update_vision(player: Player, board: Board):
-    clear_vision(player)
 
-    fog_tiles = set()
-    clear_tiles = set()
+def update_vision(player: Player, board: Board, changed_tiles=()):
+    if player.vision is None:
+        player.vision = VisionTracker(board.width, board.height)
 
-    for piece in player.board.get_pieces(player, True):
-        fog, clear = get_piece_vision(board, piece)
-        fog_tiles.update(fog)
-        clear_tiles.update(clear)
-
-    for x in range(board.height):
-        for y in range(board.width):
-            if (x, y) in clear_tiles:
-                player.board.get_tile(x, y).type = board.get_tile(x, y).type
-            elif (x, y) in fog_tiles:
-                if board.get_tile(x, y).is_floor():
-                    player.board.get_tile(x, y).type = TileType.FOG_FLOOR
-                elif board.get_tile(x, y).is_wall():
-                    player.board.get_tile(x, y).type = TileType.FOG_WALL
-                else:
-                    player.board.get_tile(x, y).type = TileType.FOG_VOID
+    positions = [piece.position for piece in player.board.get_pieces(player, True)]
+    dirty = player.vision.update(board, positions, changed_tiles)
+    player.vision.apply(board, player.board, dirty)
 
 def update_opponent_pieces(player: Player, board: Board):
-    clear_vision = player.board.get_clear_vision()
-    for x, y in clear_vision:
-        for piece in board.get_tile(x, y).pieces:
-            print("Found piece.")
-            if piece.owner != player.name:
-                print("Enemy.")
-                player.board.get_tile(x, y).pieces.append(piece)
-
-def update_player_board(player: Player, board: Board):
+    visible = []
+    for pieces in list(board.piece_index.values()):
+        for piece in pieces:
+            x, y = piece.position
+            if piece.owner != player.name and player.board.get_tile(x, y).is_clear():
+                visible.append(piece)
+
+    shown = [piece for pieces in player.board.piece_index.values() for piece in pieces if piece.owner != player.name]
+    if shown == visible:
+        return
+    # Pieces are shared with the game board, whose set_ghost may have changed their index
+    # keys, so the view is rebuilt rather than having single pieces removed
+    own_pieces = player.board.get_pieces(player, True)
+    clear_pieces(player)
+    for piece in own_pieces:
+        player.board.add_piece(piece)
+    for piece in visible:
+        print("Enemy.")
+        player.board.add_piece(piece)
+
+def update_player_board(player: Player, board: Board, changed_tiles=()):
     update_own_pieces(player, board)
-    update_vision(player, board)
+    update_vision(player, board, changed_tiles)
     update_opponent_pieces(player, board)
-    is_game_over(board, player)
+
+def update_player_boards(board: Board, players: list["Player"], changed_tiles=()):
+    """Updates every player's board from the post-turn game board. When the game is over every board says so."""
+    for player in players:
+        is_game_over(board, player)
+    for player in players:
+        update_player_board(player, board, changed_tiles)
+        player.board.turn_number = board.turn_number
+        if board.gameover:
+            player.board.gameover = True
 
 def remove_ghost_pieces(board: Board):
-    for x in range(board.height):
-        for y in range(board.width):
-            board.tiles[x][y].pieces = [p for p in board.tiles[x][y].pieces if not p.is_ghost]
+    board.remove_ghost_pieces()
 
 def resolve_duels(game_board: Board):
-    for x in range(game_board.height):
-        for y in range(game_board.width):
-            tile = game_board.get_tile(x, y)
-            if not tile.is_floor() or len(tile.pieces) < 2:
-                continue
-
-            pieces_by_owner = {}
-
-            for piece in tile.pieces:
-                if piece.owner not in pieces_by_owner:
-                    pieces_by_owner[piece.owner] = []
-                pieces_by_owner[piece.owner].append(piece)
-
-            if len(pieces_by_owner) > 1:
-                participants = [pieces[0] for pieces in pieces_by_owner.values()]
-                print(f"Participants: {[p.number for p in participants]}")
-                rolls = {piece: random.randint(1, 6) for piece in participants}
-                min_roll = min(rolls.values())
-
-                losers = [piece for piece, roll in rolls.items() if roll == min_roll]
-                print(f"Losers: {[p.number for p in losers]}")
-                for loser in losers:
-                    kill_piece(game_board, loser)
-                    print(f"Player {loser.owner.name}'s piece {loser.number} was killed")
-
-def apply_turn(board: Board, players: list["Player"], turns: list["PlayerTurn"]):
+    for x, y in game_board.get_crowded_tiles():
+        tile = game_board.get_tile(x, y)
+        if not tile.is_floor() or len(tile.pieces) < 2:
+            continue
+
+        pieces_by_owner = {}
+
+        for piece in tile.pieces:
+            if piece.owner not in pieces_by_owner:
+                pieces_by_owner[piece.owner] = []
+            pieces_by_owner[piece.owner].append(piece)
+
+        if len(pieces_by_owner) > 1:
+            participants = [pieces[0] for pieces in pieces_by_owner.values()]
+            print(f"Participants: {[p.number for p in participants]}")
+            rolls = {piece: random.randint(1, 6) for piece in participants}
+            min_roll = min(rolls.values())
+
+            losers = [piece for piece, roll in rolls.items() if roll == min_roll]
+            print(f"Losers: {[p.number for p in losers]}")
+            for loser in losers:
+                kill_piece(game_board, loser)
+                print(f"Player {loser.owner}'s piece {loser.number} was killed")
+
+def resolve_turn(board: Board, players: list["Player"], turns: list["PlayerTurn"]):
+    """Plays the turns on the game board and returns the tiles that changed, player boards are left as they were."""
     for turn in turns:
         player = None
         for pl in players:
@@ -177,7 +152,7 @@ def apply_turn(board: Board, players: list["Player"], turns: list["PlayerTurn"])
             number_actions = 0
             for action in actions:
                 if number_actions >= NUMBER_ACTIONS:
-                    return
+                    break
                 number_actions += 1
                 if action.type == ActionType.MOVE:
                     piece = board.get_piece(action.args[0][0], action.args[0][1])
@@ -187,16 +162,19 @@ def apply_turn(board: Board, players: list["Player"], turns: list["PlayerTurn"])
                     break_wall(board, piece, action.args[1][0], action.args[1][1])
 
     remove_ghost_pieces(board)
-    for player in players:
-        update_player_board(player, board)
+    board.turn_number += 1
+    return board.pop_changed_tiles()
+
+def apply_turn(board: Board, players: list["Player"], turns: list["PlayerTurn"]):
+    update_player_boards(board, players, resolve_turn(board, players, turns))
 
 def piece_exited(board: Board, player: Player, piece: Piece, new_position: tuple[int, int]):
     if piece.is_ghost:
         return False
     
     player.pieces_exited += 1
-    board.get_tile(piece.position[0], piece.position[1]).pieces.remove(piece)
-    board.get_tile(new_position[0], new_position[1]).type = TileType.CLOSED_EXIT
+    board.remove_piece(piece)
+    board.set_tile_type(new_position[0], new_position[1], TileType.CLOSED_EXIT)
 
 def is_game_over(board: Board, player: Player):
     if player.pieces_exited >= 3:
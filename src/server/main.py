@@ -4,7 +4,9 @@ import json
 import time
 from types import SimpleNamespace
 from gen_game import generate_game
+from board_pool import BoardPool
 from logic import apply_turn, remove_ghost_pieces
+from turns import TurnScheduler, decode_turn
 import select
 
 import signal
@@ -12,8 +14,10 @@ import sys
 
 sys.path.append("../")
 from common.dto import PlayerInfoDTO, board_to_json
-from common.serialization.serialize_board import BoardEncoder
-from common.serialization.serialize_player_turn import as_player_turn
+from common.framing import send_frame, receive_frame, receive_available_frames, has_buffered_frame
+from common.compression import SUPPORTED_COMPRESSION, set_compression, get_compressor, compress_message, decompress_message
+from common.serialization.binary_board import encode_board
+from common.serialization.board_delta import DeltaEncoder
 
 IP_ADDRESS = "localhost"
 IP_PORT = 8000
@@ -26,21 +30,40 @@ class Lobby:
     def __init__(self):
         self.players = {}
         self.conn = []
+        self.board_encoders = {}
+        self.connections = {}
 
     def add_player(self, conn, player_info):
         player_name = player_info["name"]
         player_color = player_info["color"]
         self.players[conn] = PlayerInfoDTO(player_name, player_color)
+        self.connections[player_name] = conn
+        if "compression" in player_info:
+            set_compression(conn, player_info["compression"])
         print(f"Player {player_name} added with color {player_color}")
 
     def add_connection(self, conn):
         self.conn.append(conn)
+        self.board_encoders[conn] = DeltaEncoder()
         print(f"Connection added: {conn}")
 
+    def remove_connection(self, conn):
+        if conn in self.conn:
+            self.conn.remove(conn)
+        player_info = self.players.pop(conn, None)
+        if player_info is not None and self.connections.get(player_info.name) is conn:
+            del self.connections[player_info.name]
+        self.board_encoders.pop(conn, None)
+        compressor = get_compressor(conn)
+        print(f"Connection removed: {conn}" + (f", sent with {compressor.name}: {compressor.sent}" if compressor else ""))
+
     def send_to_all(self, message):
         for conn in self.conn:
             send_message(conn, message)
     
+    def get_connection(self, player_name):
+        return self.connections.get(player_name)
+
     def get_player_infos(self):
         return list(self.players.values())
 
@@ -74,13 +97,12 @@ def get_connection(server_socket, timeout):
         print(f"Error accepting connection: {e}")
         return None
 
-def receive_message(conn, buffer_size=(1 * 10 ** 9), timeout=10):
+def receive_message(conn, timeout=10):
     try:
-        conn.settimeout(timeout)  # Set the timeout here
-        data = conn.recv(buffer_size).decode()
+        data = receive_frame(conn, timeout)
         if not data:
             return None
-        return data
+        return decompress_message(conn, data).decode()
     except socket.timeout:
         print("Timeout waiting for message.")
         return None
@@ -90,7 +112,7 @@ def receive_message(conn, buffer_size=(1 * 10 ** 9), timeout=10):
 
 def send_message(conn, message):
     try:
-        conn.sendall(message.encode())
+        send_frame(conn, compress_message(conn, message if isinstance(message, bytes) else message.encode()))
         #print(f"Sent message: {message}")
     except Exception as e:
         print(f"Error sending message: {e}")
@@ -99,18 +121,17 @@ def send_message(conn, message):
 ################################# Send data ####################
 
 def send_all_boards(lobby, players):
-    for conn in lobby.conn:
-        for player in players:
-            if player.name == lobby.players[conn].name:
-                send_board(conn, player.board)
-                break
+    for player in players:
+        conn = lobby.get_connection(player.name)
+        if conn is not None:
+            send_board(conn, player.board, lobby.board_encoders[conn])
     print("Boards sent.")
 
-def send_board(conn, board):
-    send_message(conn, json.dumps(board, cls = BoardEncoder))
+def send_board(conn, board, board_encoder=None):
+    send_message(conn, board_encoder.encode(board) if board_encoder else encode_board(board))
 
 def send_num_players(conn, num_players):
-    send_message(conn, num_players.__str__())
+    send_message(conn, json.dumps({"num_players": num_players, "compression": SUPPORTED_COMPRESSION}))
 
 def send_player_infos(conn, player_infos):
     player_infos_dicts = [player.__dict__ for player in player_infos]  # Convert objects to dicts
@@ -126,10 +147,32 @@ def receive_player_info(conn):
         print("Received player info.")
         return player_info
 
-def receive_turn(conn):
-    data = receive_message(conn)
-    print(data)
-    return json.loads(data, object_hook = as_player_turn)
+def receive_turns(conn, player_name):
+    """Turns completed by what `player_name` sent since the last read, None once the connection is gone.
+
+    Only reads what already arrived, call it when select() reports `conn` readable. A turn that
+    is still coming in stays buffered, the turn deadline plays an empty turn if it is late.
+    Invalid turns are skipped.
+    """
+    try:
+        frames = receive_available_frames(conn)
+    except Exception as e:
+        print(f"Error receiving turn of {player_name}: {e}")
+        return None
+    if frames is None:
+        return None
+    turns = []
+    for data in frames:
+        try:
+            data = decompress_message(conn, data).decode()
+        except Exception as e:
+            print(f"Error decoding turn of {player_name}: {e}")
+            return None
+        try:
+            turns.append(decode_turn(data, player_name))
+        except ValueError as e:
+            print(f"Invalid turn from {player_name}: {e}")
+    return turns
 
 ################################ Main ####################
 
@@ -137,9 +180,11 @@ def main():
     address = (IP_ADDRESS, IP_PORT)
     server_socket = create_server_socket(address, NUM_PLAYERS, 100)
     lobby = Lobby()
+    board_pool = BoardPool([(BOARD_WIDTH, BOARD_HEIGHT, NUM_PLAYERS)])
 
     while len(lobby.players) < NUM_PLAYERS:
         ready_to_read, _, _ = select.select([server_socket] + lobby.conn, [], [], 1)
+        ready_to_read += [conn for conn in lobby.conn if conn not in ready_to_read and has_buffered_frame(conn)]
         for sock in ready_to_read:
             if sock is server_socket:
                 conn = get_connection(server_socket, 100)
@@ -154,20 +199,34 @@ def main():
                 for conn in lobby.conn:
                     send_player_infos(conn, lobby.get_player_infos())
 
-    board, players = generate_game(lobby.get_player_infos(), BOARD_WIDTH, BOARD_HEIGHT)
-    print("Game generated.")
+    game_map = board_pool.get(BOARD_WIDTH, BOARD_HEIGHT, NUM_PLAYERS)
+    board, players = generate_game(lobby.get_player_infos(), BOARD_WIDTH, BOARD_HEIGHT, game_map = game_map)
+    print(f"Game generated. Board pool: {board_pool.stats()}")
     send_all_boards(lobby, players)
 
-    turns = []
-    while True:
-        ready_to_read, _, _ = select.select(lobby.conn, [], [], 1)
+    scheduler = TurnScheduler([player.name for player in players])
+    scheduler.arm()
+    while lobby.conn:
+        ready_to_read, _, _ = select.select(lobby.conn, [], [], scheduler.time_left())
         for conn in ready_to_read:
-            turn = receive_turn(conn)
-            turns.append(turn)
-            if len(turns) == NUM_PLAYERS:
-                apply_turn(board, players, turns)
-                turns = []
-                send_all_boards(lobby, players)
+            player_name = lobby.players[conn].name
+            turns = receive_turns(conn, player_name)
+            if turns is None:
+                lobby.remove_connection(conn)
+                scheduler.remove_player(player_name)
+                continue
+            for turn in turns:
+                scheduler.submit(player_name, turn)
+
+        if scheduler.is_ready():
+            start = time.perf_counter()
+            apply_turn(board, players, scheduler.collect())
+            resolved = time.perf_counter()
+            send_all_boards(lobby, players)
+            scheduler.record("resolve", resolved - start)
+            scheduler.record("broadcast", time.perf_counter() - resolved)
+            scheduler.arm()
+            print(f"Turn stats: {scheduler.stats()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
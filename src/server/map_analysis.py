@@ -0,0 +1,61 @@
+from typing import List, Tuple
+import numpy as np
+
+import sys
+
+sys.path.append("../")
+from common.base_classes import TileType, TILE_CODES
+from common.grid_board import GridBoard
+
+FLOOR = TILE_CODES[TileType.FLOOR]
+WALL = TILE_CODES[TileType.WALL]
+VOID = TILE_CODES[TileType.VOID]
+
+class MapAnalysis:
+    """Neighbourhood data of a freshly mined board, computed once and reused for every placement.
+
+    Spawn and exit candidates are floor tiles with exactly three floor neighbours. Placing
+    one updates the counts of its neighbours instead of rescanning the board.
+    """
+    def __init__(self, board: GridBoard):
+        self.board = board
+        floor = np.pad(board.grid == FLOOR, 1, constant_values=False)
+        self.floor_neighbors = (floor[:-2, 1:-1].astype(np.int8) + floor[2:, 1:-1] + floor[1:-1, :-2] + floor[1:-1, 2:])
+
+        solid = np.pad((board.grid == WALL) | (board.grid == VOID), 1, constant_values=True)
+        self.enclosed = board.grid == WALL
+        for dx in range(3):
+            for dy in range(3):
+                self.enclosed &= solid[dx:dx + board.height, dy:dy + board.width]
+
+        self.candidates = floor[1:-1, 1:-1] & (self.floor_neighbors == 3)
+        self.placed: List[Tuple[int, int]] = []
+
+    def void_tiles(self) -> List[Tuple[int, int]]:
+        return [(int(x), int(y)) for x, y in np.argwhere(self.enclosed)]
+
+    def candidate_pool(self) -> List[Tuple[int, int]]:
+        return [(int(x), int(y)) for x, y in np.argwhere(self.candidates)]
+
+    def take(self, count: int, rng, tile_type: TileType, min_distance=0) -> List[Tuple[int, int]]:
+        """Turns up to `count` random candidates into `tile_type`, each at least `min_distance` (manhattan) from every placed tile."""
+        pool = self.candidate_pool()
+        rng.shuffle(pool)
+
+        taken = []
+        for x, y in pool:
+            if len(taken) == count:
+                break
+            if any(abs(x - px) + abs(y - py) < min_distance for px, py in self.placed):
+                continue
+            taken.append((x, y))
+            self.place(x, y, tile_type)
+        return taken
+
+    def place(self, x: int, y: int, tile_type: TileType):
+        self.board.set_tile_type(x, y, tile_type)
+        self.placed.append((x, y))
+        self.candidates[x, y] = False
+        for nx, ny in self.board.get_neighbors(x, y):
+            self.floor_neighbors[nx, ny] -= 1
+            self.candidates[nx, ny] = self.board.grid[nx, ny] == FLOOR and self.floor_neighbors[nx, ny] == 3
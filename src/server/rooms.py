@@ -0,0 +1,334 @@
+import asyncio
+import itertools
+import json
+import time
+
+from gen_game import generate_game
+from board_pool import BoardPool
+from logic import resolve_turn
+from views import build_views, view_boards, memory_bytes, cache_stats
+from turns import TurnScheduler, decode_turn
+from spectators import GAME_VIEW, Spectator, ViewStream, encode_streams, encode_keyframes
+from main import Lobby, NUM_PLAYERS, BOARD_WIDTH, BOARD_HEIGHT
+
+import sys
+
+sys.path.append("../")
+from common.compression import SUPPORTED_COMPRESSION, get_compressor
+from common.serialization.board_delta import ViewCache
+
+class Room:
+    """One game: its lobby, board, the scheduler collecting the turns and the streams of its spectators.
+
+    `cpu_time` adds up the thread CPU time spent on this room, which is the room's
+    share of the process since every room runs on the event loop thread.
+    """
+    def __init__(self, room_id: int, num_players=NUM_PLAYERS, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.room_id = room_id
+        self.num_players = num_players
+        self.width = width
+        self.height = height
+        self.lobby = Lobby()
+        self.board = None
+        self.players = None
+        self.scheduler = None
+        self.deadline_timer = None
+        self.turn_number = 0
+        self.view_caches = {}
+        self.streams = {}
+        self.stream_encoders = {}
+        self.cpu_time = 0.0
+        self.created = time.monotonic()
+        self.on_update = None
+
+    def __repr__(self):
+        return f"Room({self.room_id})"
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.lobby.players) >= self.num_players
+
+    @property
+    def started(self) -> bool:
+        return self.board is not None
+
+    @property
+    def finished(self) -> bool:
+        return (self.started and self.board.gameover) or not self.lobby.conn
+
+    def add_player(self, conn, player_info):
+        self.lobby.add_connection(conn)
+        self.lobby.add_player(conn, player_info)
+        self.broadcast(json.dumps([player.__dict__ for player in self.lobby.get_player_infos()]))
+
+    def remove_player(self, conn):
+        player_info = self.lobby.players.get(conn)
+        self.lobby.remove_connection(conn)
+        if self.scheduler is not None and player_info is not None:
+            self.scheduler.remove_player(player_info.name)
+        if not self.started:
+            self.broadcast(json.dumps([player.__dict__ for player in self.lobby.get_player_infos()]))
+        else:
+            self.try_play_turn()
+
+    async def launch(self, board_pool):
+        loop = asyncio.get_running_loop()
+        game_map = await loop.run_in_executor(None, board_pool.get, self.width, self.height, self.num_players)
+        if self.lobby.conn:
+            self.start(game_map)
+
+    def start(self, game_map):
+        start = time.thread_time()
+        self.board, self.players = generate_game(self.lobby.get_player_infos(), self.width, self.height, game_map = game_map)
+        for conn, player_info in self.lobby.players.items():
+            self.lobby.board_encoders[conn].cache = self.view_cache(player_info.name)
+        self.scheduler = TurnScheduler([player.name for player in self.players])
+        self.send_all_boards()
+        self.send_spectators()
+        self.arm_deadline()
+        self.cpu_time += time.thread_time() - start
+
+    def receive_turn(self, conn, data: bytes):
+        if not self.started or self.finished:
+            return
+        player_name = self.lobby.players[conn].name
+        try:
+            turn = decode_turn(data, player_name)
+        except ValueError as e:
+            print(f"{self}: invalid turn from {player_name}: {e}")
+            return
+        if self.scheduler.submit(player_name, turn):
+            self.try_play_turn()
+
+    def arm_deadline(self):
+        """Starts the clock of the current turn, once the players have their boards."""
+        self.scheduler.arm()
+        if self.deadline_timer is not None:
+            self.deadline_timer.cancel()
+        self.deadline_timer = asyncio.get_running_loop().call_later(self.scheduler.timeout, self.on_deadline)
+
+    def on_deadline(self):
+        self.deadline_timer = None
+        self.try_play_turn()
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def collect_turns(self):
+        if self.deadline_timer is not None:
+            self.deadline_timer.cancel()
+            self.deadline_timer = None
+        return self.scheduler.collect()
+
+    def try_play_turn(self):
+        if not self.started or self.finished or not self.scheduler.is_ready():
+            return
+        start = time.thread_time()
+        resolve_start = time.perf_counter()
+        changed_tiles = resolve_turn(self.board, self.players, self.collect_turns())
+        self.turn_number += 1
+        broadcast_start = time.perf_counter()
+        board_encoders = {player_info.name: self.lobby.board_encoders[conn] for conn, player_info in self.lobby.players.items()}
+        self.send_boards(build_views(self.board, self.players, changed_tiles, board_encoders))
+        self.scheduler.record("resolve", broadcast_start - resolve_start)
+        self.scheduler.record("broadcast", time.perf_counter() - broadcast_start)
+        self.send_spectators()
+        if not self.finished:
+            self.arm_deadline()
+        self.cpu_time += time.thread_time() - start
+
+    def broadcast(self, message):
+        for conn in self.lobby.conn:
+            conn.send(message)
+
+    def close(self):
+        if self.deadline_timer is not None:
+            self.deadline_timer.cancel()
+            self.deadline_timer = None
+
+    def add_spectator(self, conn, view=GAME_VIEW):
+        if view is not GAME_VIEW and view not in [player_info.name for player_info in self.lobby.get_player_infos()]:
+            raise ValueError(f"no player {view} in {self}")
+        self.streams.setdefault(view, ViewStream(view)).add(Spectator(conn, view))
+        print(f"{self}: spectator {conn} watching {view or 'the game'}.")
+        if self.started:
+            self.catch_up_spectators([view])
+
+    def remove_spectator(self, conn):
+        for stream in self.streams.values():
+            stream.remove(conn)
+        self.streams = {view: stream for view, stream in self.streams.items() if stream.spectators}
+
+    def watched_views(self) -> dict:
+        return {view: stream.needs_keyframe for view, stream in self.streams.items()}
+
+    def view_boards(self) -> dict:
+        return view_boards(self.board, self.players)
+
+    def send_spectators(self):
+        """Streams the boards of the turn just played to the spectators, after the players got theirs."""
+        self.publish_streams(encode_streams(self.stream_encoders, self.view_boards(), self.watched_views()))
+
+    def catch_up_spectators(self, views):
+        self.send_keyframes(encode_keyframes(self.stream_encoders, self.view_boards(), views))
+
+    def publish_streams(self, encoded):
+        for view, (keyframe, delta) in encoded.items():
+            if view in self.streams:
+                self.streams[view].publish(keyframe, delta)
+
+    def send_keyframes(self, keyframes):
+        for view, keyframe in keyframes.items():
+            if view in self.streams:
+                self.streams[view].catch_up(keyframe)
+
+    def view_cache(self, player_name: str) -> ViewCache:
+        """Encoded views of `player_name`, shared by every connection that watches them."""
+        return self.view_caches.setdefault(player_name, ViewCache())
+
+    def send_all_boards(self):
+        boards = {}
+        for player in self.players:
+            conn = self.lobby.get_connection(player.name)
+            if conn is not None:
+                boards[player.name] = self.lobby.board_encoders[conn].encode(player.board)
+        self.send_boards(boards)
+
+    def send_boards(self, boards):
+        for player_name, data in boards.items():
+            conn = self.lobby.get_connection(player_name)
+            if conn is not None and data is not None:
+                conn.send(data)
+        print(f"{self}: boards sent for turn {self.turn_number}.")
+
+    def memory_bytes(self) -> int:
+        """Estimated size of the room's tile buffers: boards, player views, vision counts and delta bases."""
+        if not self.started:
+            return 0
+        return memory_bytes(self.board, self.players, self.lobby.board_encoders.values())
+
+    def encode_cache_stats(self) -> tuple[int, int]:
+        return cache_stats(self.view_caches.values())
+
+    def compression_stats(self) -> dict:
+        """What the connected players were sent, before and after compression."""
+        stats = {}
+        for conn, player_info in self.lobby.players.items():
+            compressor = get_compressor(conn)
+            if compressor:
+                stats[player_info.name] = {"method": compressor.name, **compressor.sent.stats()}
+        return stats
+
+    def stats(self) -> dict:
+        return {
+            "room": self.room_id,
+            "players": len(self.lobby.players),
+            "turn": self.turn_number,
+            "cpu_time": round(self.cpu_time, 4),
+            "memory_bytes": self.memory_bytes(),
+            "compression": self.compression_stats(),
+            "encode_cache": self.encode_cache_stats(),
+            "turns": self.scheduler.stats() if self.scheduler is not None else {},
+            "streams": {view or "game": stream.stats() for view, stream in self.streams.items()},
+            "age": round(time.monotonic() - self.created, 1),
+        }
+
+class RoomManager:
+    """Hosts many rooms in one process.
+
+    Clients are matched in the order they connect: each one joins the room that is
+    filling up, and a new room opens once it is full and its game starts. Rooms are
+    dropped when their game is over or everyone left.
+    """
+    def __init__(self, num_players=NUM_PLAYERS, width=BOARD_WIDTH, height=BOARD_HEIGHT, board_pool=None, shard_pool=None):
+        self.num_players = num_players
+        self.width = width
+        self.height = height
+        # Sharded rooms take their maps from the pool too, the shard workers only play the games
+        self.shard_pool = shard_pool
+        self.board_pool = board_pool or BoardPool([(width, height, num_players)])
+        self.rooms = {}
+        self.open_room = None
+        self.room_ids = itertools.count(1)
+
+    async def handle_connection(self, conn):
+        conn.send(json.dumps({"num_players": self.num_players, "compression": SUPPORTED_COMPRESSION}))
+        room = None
+        spectating = False
+        try:
+            data = await conn.read_message()
+            if not data:
+                return
+            info = json.loads(data)
+            if "spectate" in info:
+                spectating = True
+                room = self.find_room(info["spectate"])
+                room.add_spectator(conn, info.get("view"))
+            else:
+                room = self.join(conn, info)
+                if room.is_full:
+                    self.open_room = None
+                    await self.start_room(room)
+
+            while True:
+                data = await conn.read_message()
+                if data is None:
+                    break
+                if not spectating:
+                    room.receive_turn(conn, data)
+                    self.cleanup(room)
+        except (ConnectionError, ValueError) as e:
+            print(f"Error with {conn}: {e}")
+        finally:
+            conn.close()
+            if room is not None and spectating:
+                room.remove_spectator(conn)
+            elif room is not None:
+                room.remove_player(conn)
+                self.cleanup(room)
+
+    def join(self, conn, player_info) -> Room:
+        if self.open_room is None:
+            room_id = next(self.room_ids)
+            if self.shard_pool:
+                self.open_room = self.shard_pool.create_room(room_id, self.num_players, self.width, self.height)
+            else:
+                self.open_room = Room(room_id, self.num_players, self.width, self.height)
+            self.open_room.on_update = self.cleanup
+            self.rooms[room_id] = self.open_room
+            print(f"{self.open_room} opened.")
+        room = self.open_room
+        room.add_player(conn, player_info)
+        return room
+
+    def find_room(self, room_id=None) -> Room:
+        """Room `room_id`, or the game started last when no id is given."""
+        if room_id is None:
+            started = [room for room in self.rooms.values() if room.started]
+            if started:
+                return started[-1]
+        elif room_id in self.rooms:
+            return self.rooms[room_id]
+        raise ValueError(f"no room {room_id} to spectate")
+
+    async def start_room(self, room: Room):
+        await room.launch(self.board_pool)
+        if room.started:
+            print(f"{room} started. Board pool: {self.board_pool.stats()}")
+        self.cleanup(room)
+
+    def cleanup(self, room: Room):
+        if not room.finished or room.room_id not in self.rooms:
+            return
+        del self.rooms[room.room_id]
+        if self.open_room is room:
+            self.open_room = None
+        for conn in list(room.lobby.conn):
+            conn.finish()
+        for stream in room.streams.values():
+            for spectator in stream.spectators:
+                spectator.conn.finish()
+        room.close()
+        print(f"{room} closed: {room.stats()}")
+
+    def stats(self) -> list:
+        return [room.stats() for room in self.rooms.values()]
@@ -0,0 +1,260 @@
+import asyncio
+import bisect
+import hashlib
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gen_game import generate_game
+from logic import resolve_turn
+from views import build_views, view_boards, memory_bytes, cache_stats
+from rooms import Room
+from turns import TurnScheduler
+from spectators import encode_streams, encode_keyframes
+
+import sys
+
+sys.path.append("../")
+from common.dto import PlayerInfoDTO
+from common.serialization.board_delta import DeltaEncoder
+
+VIRTUAL_NODES = 64
+
+class HashRing:
+    """Consistent hashing of keys onto nodes, adding or removing a node only moves the keys next to its points."""
+    def __init__(self, nodes, virtual_nodes=VIRTUAL_NODES):
+        self.points = []
+        self.nodes = {}
+        for node in nodes:
+            for i in range(virtual_nodes):
+                point = self._hash(f"{node}-{i}")
+                self.nodes[point] = node
+                bisect.insort(self.points, point)
+
+    @staticmethod
+    def _hash(key) -> int:
+        return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], "big")
+
+    def node_for(self, key):
+        i = bisect.bisect(self.points, self._hash(key)) % len(self.points)
+        return self.nodes[self.points[i]]
+
+class ShardGame:
+    """Game state of one room, kept inside the worker process that owns the room."""
+    def __init__(self, player_infos, width, height, game_map=None):
+        self.board, self.players = generate_game([PlayerInfoDTO(name, color) for name, color in player_infos], width, height, game_map = game_map)
+        self.board_encoders = {player.name: DeltaEncoder() for player in self.players}
+        self.stream_encoders = {}
+        self.cpu_time = 0.0
+
+    def play_turn(self, turns):
+        changed_tiles = resolve_turn(self.board, self.players, turns)
+        return build_views(self.board, self.players, changed_tiles, self.board_encoders)
+
+    def encode_boards(self):
+        return {player.name: self.board_encoders[player.name].encode(player.board) for player in self.players}
+
+    def view_boards(self):
+        return view_boards(self.board, self.players)
+
+    def encode_streams(self, views):
+        return encode_streams(self.stream_encoders, self.view_boards(), views)
+
+    def encode_keyframes(self, views):
+        return encode_keyframes(self.stream_encoders, self.view_boards(), views)
+
+    def memory_bytes(self) -> int:
+        return memory_bytes(self.board, self.players, self.board_encoders.values())
+
+    def encode_cache_stats(self) -> tuple[int, int]:
+        return cache_stats(board_encoder.cache for board_encoder in self.board_encoders.values())
+
+def shard_worker(pipe):
+    """Runs the games of one shard, answering every request on `pipe` in order."""
+    games = {}
+    while True:
+        request = pipe.recv()
+        if request is None:
+            break
+        command, room_id, args = request
+        start = time.thread_time()
+        try:
+            if command == "start":
+                player_infos, width, height, game_map, views = args
+                game = games[room_id] = ShardGame(player_infos, width, height, game_map)
+                boards = game.encode_boards()
+            elif command == "turn":
+                turns, views = args
+                game = games[room_id]
+                boards = game.play_turn(turns)
+            elif command == "keyframes":
+                pipe.send((room_id, games[room_id].encode_keyframes(args)))
+                continue
+            elif command == "close":
+                games.pop(room_id, None)
+                pipe.send((room_id, None))
+                continue
+            streams = game.encode_streams(views)
+            game.cpu_time += time.thread_time() - start
+            pipe.send((room_id, (boards, game.board.gameover, game.cpu_time, game.memory_bytes(), game.encode_cache_stats(), streams)))
+        except Exception as e:
+            print(f"Shard error in room {room_id}: {e}")
+            pipe.send((room_id, e))
+
+class Shard:
+    """Front-end side of one worker process. Requests are answered in the order they were sent.
+
+    Requests are written to the pipe from a single sender thread: a send blocks once the
+    pipe is full, which must not stall the event loop that reads the worker's replies.
+    """
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.pipe, worker_pipe = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target = shard_worker, args = (worker_pipe,), daemon = True)
+        self.process.start()
+        worker_pipe.close()
+        self.sender = ThreadPoolExecutor(max_workers = 1)
+        self.waiting = deque()
+        self.loop = None
+
+    def request(self, command: str, room_id: int, args=None) -> asyncio.Future:
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.loop.add_reader(self.pipe.fileno(), self._on_reply)
+        future = self.loop.create_future()
+        self.waiting.append(future)
+        self.sender.submit(self._send, (command, room_id, args))
+        return future
+
+    def _send(self, request):
+        try:
+            self.pipe.send(request)
+        except (OSError, ValueError) as e:
+            print(f"Shard {self.shard_id}: could not send {request[0]} for room {request[1]}: {e}")
+
+    def _on_reply(self):
+        try:
+            _, reply = self.pipe.recv()
+        except EOFError:
+            self.loop.remove_reader(self.pipe.fileno())
+            while self.waiting:
+                self.waiting.popleft().set_exception(ConnectionError(f"Shard {self.shard_id} stopped"))
+            return
+        future = self.waiting.popleft()
+        if isinstance(reply, Exception):
+            future.set_exception(reply)
+        else:
+            future.set_result(reply)
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove_reader(self.pipe.fileno())
+        self.sender.submit(self._send, None)
+        self.sender.shutdown(wait = True)
+        self.process.join()
+
+class ShardedRoom(Room):
+    """Room whose game runs in a shard worker, the front-end only keeps the connections and turns.
+
+    Turns are decoded and checked here, the worker gets them ready to play. The
+    resolve latency of a sharded room is the whole round trip to its worker, views
+    included.
+    """
+    def __init__(self, room_id: int, shard: Shard, *args):
+        super().__init__(room_id, *args)
+        self.shard = shard
+        self.launched = False
+        self.gameover = False
+        self.playing = False
+        self.memory = 0
+        self.encode_cache = (0, 0)
+
+    @property
+    def started(self) -> bool:
+        return self.launched
+
+    @property
+    def finished(self) -> bool:
+        return self.gameover or not self.lobby.conn
+
+    async def launch(self, board_pool):
+        loop = asyncio.get_running_loop()
+        game_map = await loop.run_in_executor(None, board_pool.get, self.width, self.height, self.num_players)
+        if not self.lobby.conn:
+            return
+        player_infos = [(player.name, player.color) for player in self.lobby.get_player_infos()]
+        reply = await self.shard.request("start", self.room_id, (player_infos, self.width, self.height, game_map, self.watched_views()))
+        self.launched = True
+        self.scheduler = TurnScheduler([name for name, _ in player_infos])
+        self.apply_reply(reply)
+        self.arm_deadline()
+        # Spectators that came in while the game was being generated
+        waiting = [view for view, stream in self.streams.items() if stream.needs_keyframe]
+        if waiting:
+            self.catch_up_spectators(waiting)
+
+    def try_play_turn(self):
+        if not self.started or self.finished or self.playing or not self.scheduler.is_ready():
+            return
+        self.playing = True
+        # Turns sent while the worker plays this one already count for the next turn
+        asyncio.create_task(self._play_turn(self.collect_turns()))
+
+    async def _play_turn(self, turns):
+        try:
+            resolve_start = time.perf_counter()
+            reply = await self.shard.request("turn", self.room_id, (turns, self.watched_views()))
+            self.turn_number += 1
+            broadcast_start = time.perf_counter()
+            self.apply_reply(reply)
+            self.scheduler.record("resolve", broadcast_start - resolve_start)
+            self.scheduler.record("broadcast", time.perf_counter() - broadcast_start)
+        except Exception as e:
+            print(f"{self}: turn failed in shard {self.shard.shard_id}: {e}")
+        finally:
+            self.playing = False
+        if not self.finished:
+            self.arm_deadline()
+        if self.on_update is not None:
+            self.on_update(self)
+        self.try_play_turn()
+
+    def apply_reply(self, reply):
+        boards, self.gameover, self.cpu_time, self.memory, self.encode_cache, streams = reply
+        self.send_boards(boards)
+        self.publish_streams(streams)
+
+    def catch_up_spectators(self, views):
+        asyncio.create_task(self._catch_up(views))
+
+    async def _catch_up(self, views):
+        try:
+            self.send_keyframes(await self.shard.request("keyframes", self.room_id, views))
+        except Exception as e:
+            print(f"{self}: keyframes failed in shard {self.shard.shard_id}: {e}")
+
+    def close(self):
+        super().close()
+        self.shard.request("close", self.room_id)
+
+    def memory_bytes(self) -> int:
+        return self.memory
+
+    def encode_cache_stats(self) -> tuple[int, int]:
+        return self.encode_cache
+
+class ShardPool:
+    def __init__(self, num_shards: int):
+        self.shards = [Shard(i) for i in range(num_shards)]
+        self.ring = HashRing(range(num_shards))
+
+    def shard_for(self, room_id) -> Shard:
+        return self.shards[self.ring.node_for(room_id)]
+
+    def create_room(self, room_id: int, *args) -> ShardedRoom:
+        return ShardedRoom(room_id, self.shard_for(room_id), *args)
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
@@ -0,0 +1,87 @@
+from typing import Dict, Optional
+
+import sys
+
+sys.path.append("../")
+from common.base_classes import Board
+from common.serialization.board_delta import StreamEncoder
+
+# Boards queued for a spectator before it is skipped until it catches up
+SPECTATOR_BACKLOG = 8
+# View of the game board itself, every other view is named after its player
+GAME_VIEW = None
+
+class Spectator:
+    """Read-only connection watching one view of a room."""
+    def __init__(self, conn, view: Optional[str] = GAME_VIEW):
+        self.conn = conn
+        self.view = view
+        self.needs_keyframe = True
+        self.dropped = 0
+
+    @property
+    def is_behind(self) -> bool:
+        return self.conn.pending() >= SPECTATOR_BACKLOG
+
+class ViewStream:
+    """Spectators of one view. Every board is encoded once and the same bytes go to all of them.
+
+    A spectator whose queue is backed up is skipped instead of slowing the room down and
+    gets a keyframe once it caught up, the deltas it missed are never sent.
+    """
+    def __init__(self, view: Optional[str] = GAME_VIEW):
+        self.view = view
+        self.spectators = []
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def needs_keyframe(self) -> bool:
+        return any(spectator.needs_keyframe for spectator in self.spectators)
+
+    def add(self, spectator: Spectator):
+        self.spectators.append(spectator)
+
+    def remove(self, conn):
+        self.spectators = [spectator for spectator in self.spectators if spectator.conn is not conn]
+
+    def publish(self, keyframe: Optional[bytes], delta: Optional[bytes]):
+        """Sends a new board, as `delta` to the spectators that have the board before it and as `keyframe` to the others."""
+        for spectator in self.spectators:
+            if spectator.is_behind:
+                spectator.needs_keyframe = True
+                spectator.dropped += 1
+                self.dropped += 1
+                continue
+            data = keyframe if spectator.needs_keyframe or delta is None else delta
+            if data is not None:
+                spectator.conn.send(data)
+                spectator.needs_keyframe = False
+                self.sent += 1
+
+    def catch_up(self, keyframe: bytes):
+        """Sends the current board to the spectators waiting for a keyframe only."""
+        for spectator in self.spectators:
+            if spectator.needs_keyframe and not spectator.is_behind:
+                spectator.conn.send(keyframe)
+                spectator.needs_keyframe = False
+                self.sent += 1
+
+    def stats(self) -> dict:
+        return {"spectators": len(self.spectators), "sent": self.sent, "dropped": self.dropped}
+
+def encode_streams(encoders: Dict[Optional[str], StreamEncoder], boards: Dict[Optional[str], Board], views: Dict[Optional[str], bool]) -> Dict[Optional[str], tuple]:
+    """Encodes the watched `views`, mapped to whether a keyframe is needed, and forgets the views no one watches any more."""
+    for view in list(encoders):
+        if view not in views:
+            del encoders[view]
+    encoded = {}
+    for view, keyframe in views.items():
+        if view in boards:
+            encoder = encoders.setdefault(view, StreamEncoder())
+            encoded[view] = encoder.encode(boards[view], keyframe)
+    return encoded
+
+def encode_keyframes(encoders: Dict[Optional[str], StreamEncoder], boards: Dict[Optional[str], Board], views) -> Dict[Optional[str], bytes]:
+    """Keyframes of the current boards of `views`, for spectators joining between turns."""
+    return {view: encoders.setdefault(view, StreamEncoder()).encode(boards[view], True)[0] for view in views if view in boards}
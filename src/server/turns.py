@@ -0,0 +1,146 @@
+import json
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import sys
+
+sys.path.append("../")
+from common.base_classes import PlayerTurn, Action
+from common.constants import NUMBER_ACTIONS
+from common.serialization.serialize_player_turn import as_player_turn
+
+# Seconds players get to submit a turn once their boards are sent
+TURN_TIMEOUT = 20
+LATENCY_SAMPLES = 1000
+
+def _is_position(value) -> bool:
+    return isinstance(value, list) and len(value) == 2 and all(type(v) is int for v in value)
+
+def decode_turn(data, player_name: str) -> PlayerTurn:
+    """Decodes and checks the turn sent by `player_name`, raises ValueError if it is not a valid turn.
+
+    Actions past NUMBER_ACTIONS for a piece are dropped, the game would ignore them anyway.
+    """
+    try:
+        turn = json.loads(data, object_hook = as_player_turn)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"malformed turn: {e}") from e
+    if not isinstance(turn, PlayerTurn) or not isinstance(turn.pieces_actions, dict):
+        raise ValueError("not a turn")
+    if turn.player_name != player_name:
+        raise ValueError(f"turn of {turn.player_name} sent by {player_name}")
+    if turn.turn_number is not None and type(turn.turn_number) is not int:
+        raise ValueError("turn number is not an integer")
+    for number, actions in turn.pieces_actions.items():
+        if not isinstance(actions, list):
+            raise ValueError(f"actions of piece {number} are not a list")
+        actions = actions[:NUMBER_ACTIONS]
+        for action in actions:
+            if not isinstance(action, Action) or not isinstance(action.args, list) or len(action.args) != 2 or not all(_is_position(arg) for arg in action.args):
+                raise ValueError(f"invalid action for piece {number}")
+        turn.pieces_actions[number] = actions
+    return turn
+
+class LatencyStats:
+    """Keeps the last `max_samples` durations of each stage and reports their percentiles."""
+    def __init__(self, max_samples=LATENCY_SAMPLES):
+        self.max_samples = max_samples
+        self.samples = {}
+
+    def record(self, stage: str, seconds: float):
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen = self.max_samples)
+        self.samples[stage].append(seconds)
+
+    def percentiles(self, stage: str, points=(50, 90, 99)) -> Dict[str, float]:
+        samples = sorted(self.samples.get(stage, ()))
+        if not samples:
+            return {}
+        return {f"p{p}": round(samples[min(len(samples) - 1, len(samples) * p // 100)], 4) for p in points}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {stage: self.percentiles(stage) for stage in self.samples}
+
+class TurnScheduler:
+    """Collects one turn per player and decides when the turn is played.
+
+    A turn is played once every player submitted or its deadline passed, players that
+    did not submit in time play an empty turn. A second submit from the same player in
+    a turn is ignored, and so is a turn planned on the board of an earlier turn: it came
+    in after its deadline and must not take the place of the player's next turn. Submits
+    are accepted as soon as a turn starts, the deadline and the submit latencies only
+    count from `arm`, when the players got their boards.
+    """
+    def __init__(self, player_names, timeout=TURN_TIMEOUT, clock=time.monotonic):
+        self.player_names = list(player_names)
+        self.timeout = timeout
+        self.clock = clock
+        self.turns = {}
+        self.opened = None
+        self.deadline = None
+        self.latency = LatencyStats()
+        self.turn_number = 0
+        self.timeouts = 0
+        self.duplicates = 0
+        self.stale = 0
+
+    def start_turn(self):
+        self.turns = {}
+        self.opened = None
+        self.deadline = None
+
+    def arm(self):
+        self.opened = self.clock()
+        self.deadline = self.opened + self.timeout
+
+    def submit(self, player_name: str, turn) -> bool:
+        if player_name not in self.player_names:
+            return False
+        if turn.turn_number is not None and turn.turn_number != self.turn_number:
+            self.stale += 1
+            print(f"Turn {turn.turn_number} from {player_name} ignored, turn {self.turn_number} is being played.")
+            return False
+        if player_name in self.turns:
+            self.duplicates += 1
+            print(f"Duplicate turn from {player_name} ignored.")
+            return False
+        self.turns[player_name] = turn
+        elapsed = self.clock() - self.opened if self.opened is not None else 0.0
+        if len(self.turns) == 1:
+            self.latency.record("first_submit", elapsed)
+        if len(self.turns) == len(self.player_names):
+            self.latency.record("last_submit", elapsed)
+        return True
+
+    def remove_player(self, player_name: str):
+        if player_name in self.player_names:
+            self.player_names.remove(player_name)
+        self.turns.pop(player_name, None)
+
+    def time_left(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    def is_ready(self) -> bool:
+        if not self.player_names:
+            return False
+        return len(self.turns) >= len(self.player_names) or self.time_left() == 0.0
+
+    def collect(self) -> List[PlayerTurn]:
+        """Turns of every player in join order, with an empty turn for each one that missed the deadline, and starts the next turn."""
+        missing = [name for name in self.player_names if name not in self.turns]
+        if missing:
+            self.timeouts += len(missing)
+            print(f"Turn deadline passed, empty turns for {missing}.")
+        turns = [self.turns[name] if name in self.turns else PlayerTurn(name, self.turn_number) for name in self.player_names]
+        self.turn_number += 1
+        self.start_turn()
+        return turns
+
+    def record(self, stage: str, seconds: float):
+        self.latency.record(stage, seconds)
+
+    def stats(self) -> dict:
+        return {"timeouts": self.timeouts, "duplicates": self.duplicates, "stale": self.stale, **self.latency.stats()}
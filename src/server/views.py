@@ -0,0 +1,38 @@
+from typing import Dict, Iterable, List
+
+from logic import update_player_boards
+from spectators import GAME_VIEW
+
+import sys
+
+sys.path.append("../")
+from common.base_classes import Board, Player
+
+def build_views(board: Board, players: List[Player], changed_tiles, board_encoders: Dict[str, object] = None) -> Dict[str, bytes]:
+    """Updates the board of every player, as apply_turn does, and encodes it with the player's encoder, if any."""
+    board_encoders = board_encoders or {}
+    update_player_boards(board, players, changed_tiles)
+    return {player.name: board_encoders[player.name].encode(player.board) if player.name in board_encoders else None for player in players}
+
+def view_boards(board: Board, players: List[Player]) -> dict:
+    """Every view of a game: the board of each player and the game board itself."""
+    boards = {player.name: player.board for player in players}
+    boards[GAME_VIEW] = board
+    return boards
+
+def memory_bytes(board: Board, players: List[Player], board_encoders: Iterable) -> int:
+    """Estimated size of a game's tile buffers: boards, player views, vision counts and delta bases."""
+    total = board.grid.nbytes
+    for player in players:
+        total += player.board.grid.nbytes
+        if player.vision is not None:
+            total += player.vision.fog_counts.nbytes + player.vision.clear_counts.nbytes
+    for board_encoder in board_encoders:
+        if board_encoder.state is not None:
+            total += len(board_encoder.state.codes)
+    return total
+
+def cache_stats(caches: Iterable) -> tuple[int, int]:
+    """Hits and misses of the view caches a game encodes its boards with."""
+    caches = list(caches)
+    return sum(cache.hits for cache in caches), sum(cache.misses for cache in caches)
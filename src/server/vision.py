@@ -0,0 +1,68 @@
+from collections import Counter
+from typing import Iterable, Tuple
+import numpy as np
+
+import sys
+
+sys.path.append("../")
+from common.grid_board import GridBoard, FOG_CODES
+
+FOG_RADIUS = 4
+CLEAR_RADIUS = 2
+
+# Offsets seen by a piece, as boolean stamps centred on the piece
+FOG_STAMP = np.ones((2 * FOG_RADIUS + 1, 2 * FOG_RADIUS + 1), dtype=bool)
+CLEAR_STAMP = np.ones((2 * CLEAR_RADIUS + 1, 2 * CLEAR_RADIUS + 1), dtype=bool)
+
+def stamp_slices(board: GridBoard, position: tuple[int, int], stamp: np.ndarray) -> Tuple[tuple, tuple]:
+    """Returns the board slice covered by `stamp` centred on `position` and the matching part of the stamp."""
+    radius_x, radius_y = stamp.shape[0] // 2, stamp.shape[1] // 2
+    x0, y0 = position[0] - radius_x, position[1] - radius_y
+    bx0, by0 = max(0, x0), max(0, y0)
+    bx1, by1 = min(board.height, x0 + stamp.shape[0]), min(board.width, y0 + stamp.shape[1])
+    board_slice = (slice(bx0, bx1), slice(by0, by1))
+    stamp_slice = (slice(bx0 - x0, bx1 - x0), slice(by0 - y0, by1 - y0))
+    return board_slice, stamp_slice
+
+class VisionTracker:
+    """Per player fog of war, kept up to date from the pieces that moved since the last turn.
+
+    Every tile holds how many of the player's pieces see it, so a piece leaving
+    only touches the tiles whose count drops to zero.
+    """
+    def __init__(self, width: int, height: int):
+        self.positions = Counter()
+        self.fog_counts = np.zeros((height, width), dtype=np.int16)
+        self.clear_counts = np.zeros((height, width), dtype=np.int16)
+
+    def update(self, board: GridBoard, positions: Iterable[tuple[int, int]], changed_tiles: Iterable[tuple[int, int]]) -> np.ndarray:
+        """Moves the tracked pieces to `positions` and returns the mask of tiles whose view must be recomputed."""
+        new_positions = Counter(positions)
+        dirty = np.zeros(self.fog_counts.shape, dtype=bool)
+
+        for position, count in (self.positions - new_positions).items():
+            self._stamp(board, position, -count, dirty)
+        for position, count in (new_positions - self.positions).items():
+            self._stamp(board, position, count, dirty)
+        self.positions = new_positions
+
+        for x, y in changed_tiles:
+            if self.fog_counts[x, y] > 0:
+                dirty[x, y] = True
+        return dirty
+
+    def apply(self, board: GridBoard, view: GridBoard, dirty: np.ndarray):
+        """Copies the visible tile types of `board` into `view` for the tiles in `dirty`."""
+        if not dirty.any():
+            return
+        source = board.grid[dirty]
+        view_types = np.where(self.fog_counts[dirty] > 0, FOG_CODES[source], FOG_CODES[view.grid[dirty]])
+        view.write_codes(dirty, np.where(self.clear_counts[dirty] > 0, source, view_types))
+
+    def _stamp(self, board: GridBoard, position: tuple[int, int], delta: int, dirty: np.ndarray):
+        for counts, stamp in [(self.fog_counts, FOG_STAMP), (self.clear_counts, CLEAR_STAMP)]:
+            board_slice, stamp_slice = stamp_slices(board, position, stamp)
+            area = stamp[stamp_slice]
+            before = counts[board_slice] > 0
+            counts[board_slice] += np.where(area, delta, 0).astype(np.int16)
+            dirty[board_slice] |= area & (before != (counts[board_slice] > 0))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tests import common.* like the client and server do, and the server modules by name
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(SRC, "server"))
@@ -0,0 +1,79 @@
+import asyncio
+import contextlib
+import io
+
+from common.framing import FrameReader, encode_frame
+from async_main import Connection, MAX_PENDING_MESSAGES
+
+async def connected(handler):
+    """Runs `handler` on the server side of a new connection, returns the client streams and the handler task."""
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        accepted.set_result(asyncio.current_task())
+        await handler(Connection(reader, writer))
+
+    server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+    task = await accepted
+    return server, reader, writer, task
+
+async def read_frames(reader) -> list:
+    frames = FrameReader()
+    frames.feed(await reader.read())
+    received = []
+    while True:
+        frame = frames.next_frame()
+        if frame is None:
+            return received
+        received.append(frame)
+
+def test_messages_in_split_frames():
+    async def run():
+        async def echo(conn):
+            while True:
+                message = await conn.read_message()
+                if message is None:
+                    break
+                conn.send(message.upper())
+            conn.finish()
+            await conn.writer_task
+
+        server, reader, writer, task = await connected(echo)
+        data = encode_frame(b"one") + encode_frame(b"two")
+        for i in range(len(data)):
+            writer.write(data[i:i + 1])
+            await writer.drain()
+        writer.write_eof()
+        frames = await read_frames(reader)
+        await task
+        writer.close()
+        server.close()
+        return frames
+
+    assert asyncio.run(run()) == [b"ONE", b"TWO"]
+
+def test_client_that_does_not_keep_up_is_disconnected():
+    async def run():
+        state = {}
+
+        async def flood(conn):
+            for i in range(MAX_PENDING_MESSAGES + 1):
+                conn.send(b"board %d" % i)
+            state["closing"] = conn.writer.is_closing()
+            conn.send(b"after close")
+            state["pending"] = conn.pending()
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            server, reader, writer, task = await connected(flood)
+            await task
+            frames = await read_frames(reader)
+        writer.close()
+        server.close()
+        return state, frames, out.getvalue()
+
+    state, frames, out = asyncio.run(run())
+    assert state == {"closing": True, "pending": MAX_PENDING_MESSAGES}
+    # The writer task was cancelled before it wrote anything
+    assert frames == []
+    assert "is not keeping up, disconnecting." in out
@@ -0,0 +1,53 @@
+import json
+import random
+
+from common.base_classes import Board, Piece, TileType
+from common.grid_board import GridBoard
+from common.serialization.binary_board import decode_board, encode_board, load_board
+from common.serialization.serialize_board import BoardEncoder, as_board, load_board_json
+
+def describe(board: Board):
+    tiles = [[(tile.type, [(p.number, tuple(p.position), p.owner, p.is_ghost, tuple(p.color)) for p in tile.pieces]) for tile in row] for row in board.tiles]
+    return board.width, board.height, board.gameover, board.turn_number, tiles
+
+def make_board(board_class, seed, gameover=False):
+    rng = random.Random(seed)
+    board = board_class(9, 7, TileType.WALL)
+    for x in range(board.height):
+        for y in range(board.width):
+            board.set_tile_type(x, y, rng.choice(list(TileType)))
+    players = [("alice", (255, 0, 0)), ("bob", (0, 128, 255)), ("élodie", (1, 2, 3))]
+    for number in range(12):
+        owner, color = rng.choice(players)
+        position = (rng.randrange(board.height), rng.randrange(board.width))
+        board.add_piece(Piece(number % 4, position, owner, rng.random() < 0.3, color))
+    board.gameover = gameover
+    board.turn_number = seed * 70000
+    return board
+
+def json_round_trip(board: Board) -> Board:
+    return json.loads(json.dumps(board, cls=BoardEncoder), object_hook=as_board)
+
+def test_binary_round_trip_matches_json():
+    for board_class in (Board, GridBoard):
+        for seed in range(5):
+            board = make_board(board_class, seed, gameover=seed % 2 == 1)
+            decoded = decode_board(encode_board(board))
+            assert describe(decoded) == describe(json_round_trip(board))
+            assert decoded.piece_index.keys() == json_round_trip(board).piece_index.keys()
+
+def test_run_length_encoded_tiles():
+    board = GridBoard(300, 4, TileType.WALL)
+    board.set_tile_type(2, 7, TileType.FLOOR)
+    board.add_piece(Piece(1, (2, 7), "alice", True, (4, 5, 6)))
+    data = encode_board(board)
+    assert len(data) < board.width * board.height
+    assert describe(decode_board(data)) == describe(json_round_trip(board))
+
+def test_load_board_accepts_both_encodings():
+    board = make_board(GridBoard, 7, gameover=True)
+    expected = describe(json_round_trip(board))
+    assert describe(load_board(encode_board(board))) == expected
+    json_data = json.dumps(board, cls=BoardEncoder).encode()
+    assert describe(load_board(json_data)) == expected
+    assert describe(load_board_json(json_data)) == expected
@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from common.base_classes import Piece, TileType
+from common.grid_board import GridBoard
+from common.serialization.board_delta import DeltaDecoder, DeltaEncoder, StreamEncoder, ViewCache, is_delta
+from common.serialization.binary_board import decode_board, encode_board
+
+TILE_TYPES = [TileType.FLOOR, TileType.WALL, TileType.FOG_FLOOR, TileType.FOG_WALL, TileType.EXIT]
+PLAYERS = [("alice", (255, 0, 0)), ("bob", (0, 128, 255))]
+
+def describe(board):
+    tiles = [[(tile.type, [(p.number, tuple(p.position), p.owner, p.is_ghost, tuple(p.color)) for p in tile.pieces]) for tile in row] for row in board.tiles]
+    return board.width, board.height, board.gameover, board.turn_number, tiles
+
+def random_turn(board, rng):
+    for _ in range(rng.randrange(6)):
+        board.set_tile_type(rng.randrange(board.height), rng.randrange(board.width), rng.choice(TILE_TYPES))
+    for position, pieces in board.get_occupied_tiles():
+        for piece in list(pieces):
+            if rng.random() < 0.3:
+                board.remove_piece(piece)
+    for _ in range(rng.randrange(4)):
+        owner, color = rng.choice(PLAYERS)
+        position = (rng.randrange(board.height), rng.randrange(board.width))
+        board.add_piece(Piece(rng.randrange(4), position, owner, rng.random() < 0.3, color))
+    board.gameover = rng.random() < 0.1
+    board.turn_number += 1
+
+def decode(decoder, data):
+    keyframe, _, gameover = decoder.update(data)
+    if keyframe is not None:
+        return keyframe
+    board = decoder.state.to_board()
+    board.gameover = gameover
+    return board
+
+def test_decoded_boards_follow_the_server_board():
+    for seed in range(3):
+        rng = random.Random(seed)
+        board = GridBoard(10, 8, TileType.FLOOR)
+        encoder = DeltaEncoder(keyframe_interval=5)
+        decoder = DeltaDecoder()
+        kinds = []
+        for _ in range(30):
+            random_turn(board, rng)
+            data = encoder.encode(board)
+            kinds.append(is_delta(data))
+            decoded = decode(decoder, data)
+            assert describe(decoded) == describe(board)
+        assert kinds[:7] == [False, True, True, True, True, True, False]
+
+def test_patched_boards_follow_the_server_board():
+    rng = random.Random(4)
+    board = GridBoard(10, 8, TileType.FLOOR)
+    encoder = DeltaEncoder(keyframe_interval=5)
+    decoder = DeltaDecoder()
+    client_board = None
+    for turn in range(30):
+        random_turn(board, rng)
+        keyframe, changed_tiles, gameover = decoder.update(encoder.encode(board))
+        if keyframe is not None:
+            client_board = keyframe
+        else:
+            decoder.patch(client_board, changed_tiles, gameover)
+        assert describe(client_board) == describe(board)
+        # Local edits, e.g. planned moves, are put back to the server view by the next update
+        client_board.set_tile_type(turn % 8, turn % 10, TileType.WALL)
+        client_board.add_piece(Piece(9, (1, 1), "alice", True, (255, 0, 0)))
+
+def test_keyframes_on_request_and_size_change():
+    encoder = DeltaEncoder()
+    board = GridBoard(6, 6, TileType.FLOOR)
+    assert not is_delta(encoder.encode(board))
+    assert is_delta(encoder.encode(board))
+    encoder.request_keyframe()
+    assert describe(decode_board(encoder.encode(board))) == describe(decode_board(encode_board(board)))
+    assert not is_delta(encoder.encode(GridBoard(7, 6, TileType.FLOOR)))
+
+def test_delta_without_keyframe():
+    encoder = DeltaEncoder()
+    board = GridBoard(6, 6, TileType.FLOOR)
+    encoder.encode(board)
+    board.set_tile_type(1, 1, TileType.WALL)
+    delta = encoder.encode(board)
+    with pytest.raises(ValueError):
+        DeltaDecoder().update(delta)
+
+def test_stream_deltas_and_keyframes():
+    rng = random.Random(5)
+    board = GridBoard(10, 8, TileType.FLOOR)
+    stream = StreamEncoder()
+    keyframe, delta = stream.encode(board)
+    assert keyframe is not None and delta is None
+    decoder = DeltaDecoder()
+    decode(decoder, keyframe)
+    for turn in range(10):
+        random_turn(board, rng)
+        keyframe, delta = stream.encode(board, keyframe=turn == 5)
+        assert (keyframe is not None) == (turn == 5)
+        assert describe(decode(decoder, delta)) == describe(board)
+        if keyframe is not None:
+            assert describe(decode(DeltaDecoder(), keyframe)) == describe(board)
+
+def test_shared_cache_encodes_each_delta_once():
+    board = GridBoard(6, 6, TileType.FLOOR)
+    cache = ViewCache()
+    encoders = [DeltaEncoder(cache=cache) for _ in range(3)]
+    keyframes = [encoder.encode(board) for encoder in encoders]
+    board.set_tile_type(2, 2, TileType.WALL)
+    deltas = [encoder.encode(board) for encoder in encoders]
+    assert all(data is keyframes[0] for data in keyframes)
+    assert all(data is deltas[0] for data in deltas)
+    assert (cache.misses, cache.hits) == (2, 4)
+
+def test_new_board_with_the_same_view_key():
+    cache = ViewCache()
+    first, second = DeltaEncoder(cache=cache), DeltaEncoder(cache=cache)
+    first_decoder, second_decoder = DeltaDecoder(), DeltaDecoder()
+    old_board = GridBoard(6, 6, TileType.FLOOR)
+    decode(first_decoder, first.encode(old_board))
+    new_board = GridBoard(6, 6, TileType.WALL)
+    assert new_board.view_key() == old_board.view_key()
+    decode(second_decoder, second.encode(new_board))
+    new_board.set_tile_type(2, 2, TileType.FLOOR)
+    old_board.set_tile_type(2, 2, TileType.WALL)
+    # Both encoders start from the same view key of different boards, each gets its own delta
+    assert describe(decode(second_decoder, second.encode(new_board))) == describe(new_board)
+    assert describe(decode(first_decoder, first.encode(new_board))) == describe(new_board)
+
+def test_unchanged_view_is_sent_with_the_new_turn_number():
+    board = GridBoard(6, 6, TileType.FLOOR)
+    cache = ViewCache()
+    encoders = [DeltaEncoder(cache=cache) for _ in range(2)]
+    decoder = DeltaDecoder()
+    decode(decoder, encoders[0].encode(board))
+    encoders[1].encode(board)
+    state = cache.state
+    board.turn_number = 1
+    deltas = [encoder.encode(board) for encoder in encoders]
+    # Nothing to snapshot again, the delta is empty but for the turn number and encoded once
+    assert cache.state is state and deltas[0] is deltas[1]
+    client_board = decode(decoder, deltas[0])
+    assert describe(client_board) == describe(board)
+    assert client_board.turn_number == 1
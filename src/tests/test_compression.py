@@ -0,0 +1,34 @@
+import contextlib
+import io
+
+from common.compression import ZLIB_COMPRESSION, NO_COMPRESSION, compress_message, decompress_message, set_compression
+from rooms import Room
+
+class FakeConnection:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+def test_round_trip_on_one_stream():
+    sender, receiver = FakeConnection(), FakeConnection()
+    set_compression(sender, ZLIB_COMPRESSION)
+    set_compression(receiver, NO_COMPRESSION)
+    payloads = [bytes(range(256)) * 40, b"", bytes(range(256)) * 40]
+    messages = [compress_message(sender, payload) for payload in payloads]
+    assert [decompress_message(receiver, message) for message in messages] == payloads
+    # The repeated payload is found in the stream history
+    assert len(messages[2]) < len(messages[0]) < len(payloads[0])
+
+def test_room_stats_report_compression():
+    room = Room(1, num_players = 2)
+    zlib_conn, raw_conn = FakeConnection(), FakeConnection()
+    with contextlib.redirect_stdout(io.StringIO()):
+        room.add_player(zlib_conn, {"name": "a", "color": (1, 2, 3), "compression": ZLIB_COMPRESSION})
+        room.add_player(raw_conn, {"name": "b", "color": (4, 5, 6), "compression": NO_COMPRESSION})
+    for conn in (zlib_conn, raw_conn):
+        compress_message(conn, b"x" * 1000)
+    stats = room.stats()["compression"]
+    assert stats["a"]["method"] == ZLIB_COMPRESSION and stats["a"]["raw_bytes"] == 1000 and stats["a"]["ratio"] > 10
+    assert stats["b"] == {"method": NO_COMPRESSION, "messages": 1, "raw_bytes": 1000, "wire_bytes": 1001, "ratio": 1.0}
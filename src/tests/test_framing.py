@@ -0,0 +1,74 @@
+import socket
+
+import pytest
+
+from common.framing import HEADER, MAX_FRAME_SIZE, RECV_SIZE, FrameError, FrameReader, encode_frame, has_buffered_frame, receive_available_frames, receive_frame, send_frame
+
+def test_frames_split_across_reads():
+    reader = FrameReader()
+    data = encode_frame(b"hello") + encode_frame(b"") + encode_frame(b"world")
+    frames = []
+    for i in range(len(data)):
+        reader.feed(data[i:i + 1])
+        frame = reader.next_frame()
+        if frame is not None:
+            frames.append(frame)
+    assert frames == [b"hello", b"", b"world"]
+    assert reader.buffer == bytearray()
+
+def test_frames_sent_back_to_back():
+    first, second = socket.socketpair()
+    with first, second:
+        send_frame(first, b"one")
+        send_frame(first, b"two")
+        assert receive_frame(second, 1) == b"one"
+        assert has_buffered_frame(second)
+        assert receive_frame(second, 1) == b"two"
+        assert not has_buffered_frame(second)
+
+def test_read_available_frames():
+    first, second = socket.socketpair()
+    with first, second:
+        data = encode_frame(b"one") + encode_frame(b"two")
+        first.sendall(data[:10])
+        assert receive_available_frames(second) == [b"one"]
+        first.sendall(data[10:])
+        assert receive_available_frames(second) == [b"two"]
+        first.close()
+        assert receive_available_frames(second) is None
+
+def test_frames_larger_than_a_read():
+    payload = bytes(range(256)) * (3 * RECV_SIZE // 256 + 7)
+    first, second = socket.socketpair()
+    with first, second:
+        first.setblocking(False)
+        data = encode_frame(payload)
+        sent = 0
+        reader = FrameReader()
+        while True:
+            if sent < len(data):
+                try:
+                    sent += first.send(data[sent:])
+                except BlockingIOError:
+                    pass
+            received = second.recv_into(reader.chunk)
+            reader.feed(reader.chunk[:received])
+            frame = reader.next_frame()
+            if frame is not None:
+                break
+    assert frame == payload
+
+def test_closed_connection():
+    first, second = socket.socketpair()
+    with second:
+        first.sendall(HEADER.pack(10) + b"cut")
+        first.close()
+        assert receive_frame(second, 1) is None
+
+def test_oversized_frames():
+    reader = FrameReader(max_frame_size=4)
+    reader.feed(HEADER.pack(5) + b"12345")
+    with pytest.raises(FrameError):
+        reader.next_frame()
+    with pytest.raises(FrameError):
+        encode_frame(bytes(MAX_FRAME_SIZE + 1))
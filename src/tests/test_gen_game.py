@@ -0,0 +1,36 @@
+import random
+
+import gen_game
+from common.base_classes import TileType, FLOOR_TYPES
+from gen_game import generate_layout, generate_map
+
+def floor_share(board):
+    return sum(board.count_tiles(tile_type) for tile_type in FLOOR_TYPES) / (board.width * board.height)
+
+def test_same_seed_same_map():
+    first_board, first_spawns = generate_map(40, 30, 4, seed = 7)
+    second_board, second_spawns = generate_map(40, 30, 4, seed = 7)
+    assert first_board.tile_codes() == second_board.tile_codes()
+    assert first_spawns == second_spawns
+    assert generate_map(40, 30, 4, seed = 8)[0].tile_codes() != first_board.tile_codes()
+
+def test_density_is_reached_in_one_attempt(monkeypatch):
+    attempts = []
+    mine_board = gen_game.mine_board
+    monkeypatch.setattr(gen_game, "mine_board", lambda *args: attempts.append(1) or mine_board(*args))
+    for density in (0.35, 0.5, 0.6):
+        attempts.clear()
+        board, _ = generate_layout(60, 60, random.Random(1), density)
+        assert floor_share(board) >= int(60 * 60 * density) / (60 * 60)
+        assert len(attempts) == 1
+
+def test_unreachable_density_returns_the_best_attempt(capsys):
+    board, _ = generate_layout(20, 20, random.Random(1), 0.95)
+    assert 0.35 < floor_share(board) < 0.95
+    assert "No 20x20 board reached" in capsys.readouterr().out
+
+def test_spawns_and_exits_are_placed():
+    board, spawns = generate_map(30, 30, 3, seed = 2)
+    assert len(spawns) == 3
+    assert all(board.get_tile(x, y).type == TileType.SPAWN for x, y in spawns)
+    assert board.count_tiles(TileType.EXIT) == 7
@@ -0,0 +1,49 @@
+import pytest
+
+from common.base_classes import Board, Piece, TileType
+from common.grid_board import GridBoard
+
+def make_boards():
+    boards = [Board(6, 5, TileType.WALL), GridBoard(6, 5, TileType.WALL)]
+    for board in boards:
+        for x in range(1, 4):
+            for y in range(1, 5):
+                board.set_tile_type(x, y, TileType.FLOOR)
+    return boards
+
+def test_reading_an_empty_tile_does_not_add_it():
+    board = GridBoard(4, 4, TileType.FLOOR)
+    assert not board.get_tile(1, 2).pieces
+    assert not board.pieces_at(2, 1)
+    assert board.tile_pieces == {}
+
+def test_writes_to_a_missing_tile_are_not_lost_silently():
+    board = GridBoard(4, 4, TileType.FLOOR)
+    with pytest.raises(AttributeError):
+        board.pieces_at(1, 1).append(Piece(1, (1, 1), "a", False, (1, 2, 3)))
+    assert board.tile_pieces == {}
+
+def test_pieces_match_board():
+    for board in make_boards():
+        first = Piece(1, (1, 1), "a", False, (1, 2, 3))
+        second = Piece(2, (1, 1), "b", False, (4, 5, 6))
+        board.add_piece(first)
+        board.add_piece(second)
+        board.set_ghost(first, True)
+        assert list(board.pieces_at(1, 1)) == [first, second]
+        assert board.get_piece(1, 1) is second
+        assert board.find_pieces("a", 1, True) == [first]
+        board.remove_ghost_pieces()
+        board.remove_piece(second)
+        assert not board.get_tile(1, 1).pieces
+        assert board.piece_index == {}
+        assert board.get_occupied_tiles() == []
+
+def test_tile_queries_match_board():
+    board, grid_board = make_boards()
+    for other in (board, grid_board):
+        other.set_tile_type(2, 2, TileType.WALL)
+    assert grid_board.tile_codes() == board.tile_codes()
+    assert grid_board.get_breakable_walls() == board.get_breakable_walls()
+    assert sorted(grid_board.get_enclosed_walls()) == sorted(board.get_enclosed_walls())
+    assert grid_board.count_tiles(TileType.FLOOR) == board.count_tiles(TileType.FLOOR)
@@ -0,0 +1,53 @@
+import random
+import socket
+import time
+
+from common.base_classes import Piece, TileType
+from common.framing import send_frame
+from common.grid_board import GridBoard
+from common.serialization.board_delta import DeltaEncoder, is_delta
+from client.network import BOARD, CLOSED, NetworkClient
+
+from test_board_delta import describe, random_turn
+
+def wait_for(network, expected, timeout=5):
+    """Polls like the render loop until the newest board matches `expected`."""
+    board = None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for kind, value in network.poll():
+            assert kind == BOARD
+            board = value
+        if board is not None and describe(board) == expected:
+            return board
+        time.sleep(0.001)
+    raise AssertionError("the client board never caught up with the server board")
+
+def test_double_buffered_boards_follow_the_server_board():
+    rng = random.Random(6)
+    board = GridBoard(10, 8, TileType.FLOOR)
+    encoder = DeltaEncoder(keyframe_interval=7)
+    server, client = socket.socketpair()
+    network = NetworkClient(client)
+    network.start()
+    boards = []
+    keyframes = 0
+    with server, client:
+        for turn in range(40):
+            # Several updates may arrive between two polls
+            for _ in range(rng.randint(1, 3)):
+                random_turn(board, rng)
+                data = encoder.encode(board)
+                keyframes += not is_delta(data)
+                send_frame(server, data)
+            front = wait_for(network, describe(board))
+            if not any(front is other for other in boards):
+                boards.append(front)
+            # Planned moves on the board being drawn
+            front.set_tile_type(turn % 8, turn % 10, TileType.WALL)
+            front.add_piece(Piece(9, (1, 1), "alice", True, (255, 0, 0)))
+        server.shutdown(socket.SHUT_WR)
+        network.thread.join(5)
+        assert network.poll() == [(CLOSED, None)]
+    # Deltas patch the two buffers, a keyframe brings a new board and the other buffer is rebuilt once
+    assert len(boards) <= 2 * keyframes
@@ -0,0 +1,105 @@
+from collections import deque
+
+from common.base_classes import Board, TileType
+from common.grid_board import GridBoard
+from common.pathfinding import PathFinder, UNREACHABLE, check_reachability, is_playable
+from gen_game import generate_map
+
+ROWS = [
+    "#######",
+    "#..#..#",
+    "#..#..#",
+    "#.....#",
+    "#######",
+]
+
+def make_board(board_class=Board, rows=ROWS):
+    board = board_class(len(rows[0]), len(rows), TileType.WALL)
+    for x, row in enumerate(rows):
+        for y, char in enumerate(row):
+            if char == ".":
+                board.set_tile_type(x, y, TileType.FLOOR)
+    return board
+
+def bfs(board, source):
+    distances = {tuple(source): 0}
+    queue = deque([tuple(source)])
+    while queue:
+        x, y = queue.popleft()
+        for neighbor in board.get_neighbors(x, y):
+            if neighbor not in distances and board.is_floor(*neighbor):
+                distances[neighbor] = distances[(x, y)] + 1
+                queue.append(neighbor)
+    return distances
+
+def test_distances_follow_board_changes():
+    for board_class in (Board, GridBoard):
+        board = make_board(board_class)
+        finder = PathFinder(board)
+        assert finder.distance((1, 1), (1, 5)) == bfs(board, (1, 5))[(1, 1)] == 8
+
+        board.set_tile_type(1, 3, TileType.FLOOR)
+        assert finder.distance((1, 1), (1, 5)) == 4
+        board.set_tile_type(3, 3, TileType.WALL)
+        board.set_tile_type(1, 3, TileType.WALL)
+        assert finder.distance((1, 1), (1, 5)) == UNREACHABLE
+        finder.detach()
+
+def test_closing_a_source_drops_its_field():
+    board = make_board()
+    finder = PathFinder(board)
+    field = finder.distance_field((3, 3))
+    assert finder.distance_field((3, 3)) is field
+    board.set_tile_type(3, 3, TileType.WALL)
+    assert finder.distance_field((3, 3)) is not field
+    assert finder.distance((1, 1), (1, 5)) == UNREACHABLE
+
+def test_playable_maps():
+    board = make_board()
+    assert check_reachability(board, [(1, 1)], [(1, 5)]) == {(1, 1): 8}
+    assert is_playable(board, [(1, 1), (2, 5)], [(1, 4)])
+    board.set_tile_type(3, 3, TileType.WALL)
+    assert check_reachability(board, [(1, 1)], [(1, 5)]) == {(1, 1): UNREACHABLE}
+    assert not is_playable(board, [(1, 1), (2, 5)], [(1, 2)])
+    assert not is_playable(board, [(1, 1)], [(1, 5)])
+
+    for seed in range(5):
+        board, spawns = generate_map(30, 30, 4, seed = seed)
+        exits = [(x, y) for x in range(board.height) for y in range(board.width) if board.get_tile(x, y).type == TileType.EXIT]
+        assert is_playable(board, spawns, exits)
+
+def test_distance_does_not_depend_on_cached_fields():
+    board = make_board()
+    floor = [(x, y) for x in range(board.height) for y in range(board.width) if board.is_floor(x, y)]
+    ends = floor + [(1, 3), (2, 3), (0, 1)]
+    expected = {(a, b): PathFinder(board).distance(a, b) for a in ends for b in ends}
+    finder = PathFinder(board)
+    for a in ends:
+        finder.distance_field(a)
+        for b in ends:
+            assert finder.distance(a, b) == expected[(a, b)]
+    for a in floor:
+        for b in floor:
+            assert expected[(a, b)] == bfs(board, b).get(a, UNREACHABLE)
+
+def test_next_step_walks_a_shortest_path():
+    board = make_board()
+    finder = PathFinder(board)
+    position, steps = (1, 1), 0
+    while position != (1, 5):
+        following = finder.next_step(position, (1, 5))
+        assert following in board.get_neighbors(*position) and board.is_floor(*following)
+        position, steps = following, steps + 1
+    assert steps == bfs(board, (1, 5))[(1, 1)]
+    assert finder.next_step((1, 5), (1, 5)) is None
+    board.set_tile_type(3, 3, TileType.WALL)
+    assert finder.next_step((1, 1), (1, 5)) is None
+
+def test_nearest_reachable_target():
+    board = make_board()
+    finder = PathFinder(board)
+    assert finder.nearest((1, 1), [(1, 5), (3, 5), (2, 2)]) == ((2, 2), 2)
+    assert finder.nearest((1, 1), [(1, 5), [3, 4]]) == ((3, 4), 5)
+    board.set_tile_type(3, 3, TileType.WALL)
+    assert finder.nearest((1, 1), [(1, 5), (3, 5)]) == (None, UNREACHABLE)
+    assert finder.nearest((1, 1), []) == (None, UNREACHABLE)
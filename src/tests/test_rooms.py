@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import io
+import json
+
+from gen_game import generate_map
+from rooms import RoomManager
+
+class FakeConnection:
+    """Connection fed by the test: `receive` queues a client message, None hangs up."""
+    def __init__(self, name):
+        self.name = name
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.finished = False
+        self.closed = False
+
+    def __repr__(self):
+        return f"FakeConnection({self.name})"
+
+    def receive(self, message):
+        self.incoming.put_nowait(message)
+
+    async def read_message(self):
+        return await self.incoming.get()
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def pending(self) -> int:
+        return 0
+
+    def finish(self):
+        self.finished = True
+
+    def close(self):
+        self.closed = True
+
+class FakeBoardPool:
+    def __init__(self):
+        self.seeds = iter(range(1000))
+
+    def get(self, width, height, num_players):
+        return generate_map(width, height, num_players, seed = next(self.seeds))
+
+    def stats(self):
+        return {}
+
+async def wait_until(condition, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def join(manager, name):
+    conn = FakeConnection(name)
+    conn.receive(json.dumps({"name": name, "color": (1, 2, 3)}))
+    return conn, asyncio.create_task(manager.handle_connection(conn))
+
+def test_matchmaking_and_cleanup():
+    async def run():
+        manager = RoomManager(num_players = 2, width = 20, height = 20, board_pool = FakeBoardPool())
+        a, a_task = join(manager, "a")
+        b, b_task = join(manager, "b")
+        c, c_task = join(manager, "c")
+        await wait_until(lambda: 1 in manager.rooms and manager.rooms[1].started and 2 in manager.rooms)
+        first, second = manager.rooms[1], manager.rooms[2]
+        # Clients fill the open room in the order they connect, the next room opens once it is full
+        assert [info.name for info in first.lobby.get_player_infos()] == ["a", "b"]
+        assert [info.name for info in second.lobby.get_player_infos()] == ["c"]
+        assert manager.open_room is second and not second.started
+        assert json.loads(a.sent[0])["num_players"] == 2
+        assert all(isinstance(message, bytes) for message in a.sent[-1:] + b.sent[-1:])
+
+        # A game that is over is closed with the next message
+        first.board.gameover = True
+        a.receive(b"{}")
+        await wait_until(lambda: 1 not in manager.rooms)
+        assert a.finished and b.finished
+        a.receive(None)
+        b.receive(None)
+        await asyncio.gather(a_task, b_task)
+        assert a.closed and b.closed
+
+        # A room everyone left is closed before it starts
+        c.receive(None)
+        await c_task
+        assert manager.rooms == {} and manager.open_room is None
+        d, d_task = join(manager, "d")
+        await wait_until(lambda: manager.open_room is not None)
+        assert manager.open_room.room_id == 3
+        d.receive(None)
+        await d_task
+        assert manager.rooms == {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run())
+
+def test_started_room_everyone_left():
+    async def run():
+        manager = RoomManager(num_players = 2, width = 20, height = 20, board_pool = FakeBoardPool())
+        (a, a_task), (b, b_task) = join(manager, "a"), join(manager, "b")
+        await wait_until(lambda: 1 in manager.rooms and manager.rooms[1].started)
+        room = manager.rooms[1]
+        a.receive(None)
+        await a_task
+        assert 1 in manager.rooms and room.scheduler.player_names == ["b"]
+        b.receive(None)
+        await b_task
+        assert manager.rooms == {} and room.deadline_timer is None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run())
@@ -0,0 +1,29 @@
+from collections import Counter
+
+from gen_game import generate_map
+from shards import HashRing, ShardGame
+
+def test_hash_ring_placement_is_stable():
+    keys = range(2000)
+    ring = HashRing(range(4))
+    placement = {key: ring.node_for(key) for key in keys}
+    assert placement == {key: HashRing(range(4)).node_for(key) for key in keys}
+    assert set(Counter(placement.values())) == {0, 1, 2, 3}
+
+    # A new node only takes keys over, about its share of them, every other key stays put
+    grown = HashRing(range(5))
+    moved = [key for key in keys if grown.node_for(key) != placement[key]]
+    assert all(grown.node_for(key) == 4 for key in moved)
+    assert len(keys) / 10 < len(moved) < len(keys) * 3 / 10
+
+    # Removing a node only moves its own keys
+    shrunk = HashRing([0, 1, 3])
+    assert all(shrunk.node_for(key) == node for key, node in placement.items() if node != 2)
+
+def test_shard_game_reports_encode_cache():
+    game = ShardGame([("a", (1, 2, 3)), ("b", (4, 5, 6))], 20, 20, generate_map(20, 20, 2, seed = 1))
+    game.encode_boards()
+    assert game.encode_cache_stats() == (0, 2)
+    game.play_turn([])
+    assert game.encode_cache_stats() == (0, 4)
+    assert game.memory_bytes() > 0
@@ -0,0 +1,72 @@
+from common.base_classes import TileType
+from common.grid_board import GridBoard
+from common.serialization.board_delta import DeltaDecoder
+from spectators import GAME_VIEW, SPECTATOR_BACKLOG, Spectator, ViewStream, encode_streams
+
+class FakeConnection:
+    """Connection whose queue the test fills up: `backlog` messages are still waiting to be written."""
+    def __init__(self):
+        self.sent = []
+        self.backlog = 0
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def pending(self) -> int:
+        return self.backlog
+
+def test_spectator_behind_is_skipped_then_sent_a_keyframe():
+    stream = ViewStream()
+    ok, slow = FakeConnection(), FakeConnection()
+    stream.add(Spectator(ok))
+    stream.add(Spectator(slow))
+    stream.publish(b"key 1", None)
+    assert ok.sent == slow.sent == [b"key 1"]
+    assert not stream.needs_keyframe
+
+    slow.backlog = SPECTATOR_BACKLOG
+    stream.publish(None, b"delta 2")
+    stream.publish(None, b"delta 3")
+    assert ok.sent == [b"key 1", b"delta 2", b"delta 3"]
+    assert slow.sent == [b"key 1"]
+    assert stream.needs_keyframe and stream.stats() == {"spectators": 2, "sent": 4, "dropped": 2}
+
+    # Still behind, nothing is sent between turns either
+    stream.catch_up(b"key 3")
+    assert slow.sent == [b"key 1"]
+
+    # Caught up: the next board comes as a keyframe, the missed deltas never do
+    slow.backlog = 0
+    stream.publish(b"key 4", b"delta 4")
+    assert ok.sent[-1] == b"delta 4"
+    assert slow.sent == [b"key 1", b"key 4"]
+    assert not stream.needs_keyframe
+
+def test_spectator_caught_up_between_turns():
+    stream = ViewStream()
+    slow = FakeConnection()
+    stream.add(Spectator(slow))
+    slow.backlog = SPECTATOR_BACKLOG
+    stream.publish(b"key 1", None)
+    slow.backlog = 0
+    stream.catch_up(b"key 1")
+    stream.publish(None, b"delta 2")
+    assert slow.sent == [b"key 1", b"delta 2"]
+
+def test_spectator_decodes_the_board_after_skipping_deltas():
+    board = GridBoard(8, 8, TileType.FLOOR)
+    encoders = {}
+    stream = ViewStream()
+    conn = FakeConnection()
+    stream.add(Spectator(conn))
+    decoder = DeltaDecoder()
+    for turn in range(6):
+        board.set_tile_type(turn, turn, TileType.WALL)
+        conn.backlog = SPECTATOR_BACKLOG if turn in (2, 3) else 0
+        keyframe, delta = encode_streams(encoders, {GAME_VIEW: board}, {GAME_VIEW: stream.needs_keyframe})[GAME_VIEW]
+        stream.publish(keyframe, delta)
+    for data in conn.sent:
+        decoder.update(data)
+    assert len(conn.sent) == 4
+    assert decoder.state.to_board().get_tile(5, 5).type == TileType.WALL
+    assert decoder.state.to_board().get_tile(3, 3).type == TileType.WALL
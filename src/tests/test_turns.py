@@ -0,0 +1,89 @@
+import json
+import socket
+
+from common.base_classes import PlayerTurn
+from common.framing import HEADER, send_frame
+from main import receive_turns
+from turns import LatencyStats, TurnScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def test_turn_played_once_everyone_submitted():
+    clock = FakeClock()
+    scheduler = TurnScheduler(["a", "b"], timeout = 20, clock = clock)
+    scheduler.arm()
+    first, second = PlayerTurn("b"), PlayerTurn("a")
+    assert scheduler.submit("b", first)
+    assert not scheduler.is_ready()
+    assert not scheduler.submit("b", PlayerTurn("b"))
+    assert not scheduler.submit("c", PlayerTurn("c"))
+    clock.now += 3
+    assert scheduler.submit("a", second)
+    assert scheduler.is_ready()
+    assert scheduler.collect() == [second, first]
+    assert scheduler.turns == {} and scheduler.time_left() is None
+    assert scheduler.stats()["duplicates"] == 1
+    assert scheduler.stats()["last_submit"] == {"p50": 3.0, "p90": 3.0, "p99": 3.0}
+
+def test_deadline_plays_empty_turns():
+    clock = FakeClock()
+    scheduler = TurnScheduler(["a", "b"], timeout = 20, clock = clock)
+    # Submits before the boards are out count, with no latency
+    turn = PlayerTurn("a", 0)
+    scheduler.submit("a", turn)
+    assert scheduler.time_left() is None and not scheduler.is_ready()
+    scheduler.arm()
+    clock.now += 19.5
+    assert scheduler.time_left() == 0.5 and not scheduler.is_ready()
+    clock.now += 1
+    assert scheduler.time_left() == 0.0 and scheduler.is_ready()
+    turns = scheduler.collect()
+    assert turns[0] is turn and turns[1].player_name == "b" and turns[1].pieces_actions == {} and turns[1].turn_number == 0
+    assert scheduler.stats()["timeouts"] == 1
+    assert scheduler.stats()["first_submit"] == {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+
+    # The turn b planned on the first board comes in late, it does not take the place of b's next turn
+    scheduler.arm()
+    assert not scheduler.submit("b", PlayerTurn("b", 0))
+    assert scheduler.submit("b", PlayerTurn("b", 1))
+    assert scheduler.stats()["stale"] == 1 and scheduler.stats()["duplicates"] == 0
+
+def test_removed_players_are_not_waited_for():
+    scheduler = TurnScheduler(["a", "b"], clock = FakeClock())
+    scheduler.arm()
+    scheduler.submit("b", PlayerTurn("b"))
+    scheduler.remove_player("b")
+    assert not scheduler.is_ready()
+    scheduler.submit("a", PlayerTurn("a"))
+    assert [turn.player_name for turn in scheduler.collect()] == ["a"]
+    scheduler.remove_player("a")
+    assert not scheduler.is_ready()
+
+def test_latency_percentiles():
+    stats = LatencyStats(max_samples = 100)
+    for i in range(200):
+        stats.record("resolve", i / 1000)
+    # Only the last 100 samples are kept: 0.1 to 0.199
+    assert stats.percentiles("resolve") == {"p50": 0.15, "p90": 0.19, "p99": 0.199}
+    assert stats.percentiles("broadcast") == {}
+    assert stats.stats() == {"resolve": {"p50": 0.15, "p90": 0.19, "p99": 0.199}}
+
+def test_receive_turns_without_waiting():
+    server, client = socket.socketpair()
+    with server, client:
+        data = json.dumps({"class": "PlayerTurn", "player_name": "a", "turn_number": 3, "pieces_actions": {}}).encode()
+        client.sendall(HEADER.pack(len(data)) + data[:5])
+        # Half a turn: nothing to submit yet, the rest stays buffered
+        assert receive_turns(server, "a") == []
+        client.sendall(data[5:] + HEADER.pack(len(data)) + data)
+        assert [(turn.player_name, turn.turn_number) for turn in receive_turns(server, "a")] == [("a", 3), ("a", 3)]
+        # An invalid turn is skipped, the connection stays
+        send_frame(client, b"not a turn")
+        assert receive_turns(server, "a") == []
+        client.close()
+        assert receive_turns(server, "a") is None
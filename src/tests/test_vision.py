@@ -0,0 +1,71 @@
+import random
+
+from common.base_classes import Action, ActionType, PlayerTurn, TileType, TILE_CODES, fog_type
+from common.dto import PlayerInfoDTO
+from common.serialization.board_delta import DeltaEncoder, ViewCache
+from gen_game import generate_game
+from logic import apply_turn
+from views import build_views
+from vision import FOG_RADIUS, CLEAR_RADIUS
+
+def around(board, position, radius):
+    x, y = position
+    return {(nx, ny) for nx in range(x - radius, x + radius + 1) for ny in range(y - radius, y + radius + 1) if not board.out_of_bounds(nx, ny)}
+
+def full_recompute(view, board, positions):
+    """Fog of war as it was computed before VisionTracker: fog everything seen, then look again from every piece."""
+    view = [[tile_type if tile_type == TileType.UNKNOWN else fog_type(tile_type) for tile_type in row] for row in view]
+    fog_tiles, clear_tiles = set(), set()
+    for position in positions:
+        fog_tiles |= around(board, position, FOG_RADIUS)
+        clear_tiles |= around(board, position, CLEAR_RADIUS)
+    for x, y in fog_tiles:
+        view[x][y] = board.get_tile(x, y).type if (x, y) in clear_tiles else fog_type(board.get_tile(x, y).type)
+    return view
+
+def random_turn(board, player, rng):
+    turn = PlayerTurn(player.name)
+    for piece in sorted(board.get_pieces(player, False), key=lambda piece: piece.number):
+        target = rng.choice(board.get_neighbors(*piece.position))
+        action_type = ActionType.BREAK if board.get_tile(*target).is_wall() else ActionType.MOVE
+        turn.pieces_actions[piece.number] = [Action(action_type, [list(piece.position), list(target)])]
+    return turn
+
+def test_incremental_vision_matches_full_recompute():
+    for seed in range(3):
+        random.seed(seed)
+        rng = random.Random(seed)
+        board, players = generate_game([PlayerInfoDTO(f"p{i}", (i, i, i)) for i in range(3)], 24, 24, seed = seed)
+        views = {}
+        for player in players:
+            empty = [[TileType.UNKNOWN] * board.width for _ in range(board.height)]
+            views[player.name] = full_recompute(empty, board, [piece.position for piece in board.get_pieces(player, True)])
+
+        for _ in range(25):
+            apply_turn(board, players, [random_turn(board, player, rng) for player in players])
+            for player in players:
+                views[player.name] = full_recompute(views[player.name], board, [piece.position for piece in board.get_pieces(player, True)])
+                expected = bytes(TILE_CODES[tile_type] for row in views[player.name] for tile_type in row)
+                assert player.board.tile_codes() == expected
+
+def test_unchanged_views_hit_the_view_cache():
+    board, players = generate_game([PlayerInfoDTO(f"p{i}", (i, i, i)) for i in range(2)], 24, 24, seed = 1)
+    caches = {player.name: ViewCache() for player in players}
+    board_encoders = {player.name: DeltaEncoder(cache = caches[player.name]) for player in players}
+    build_views(board, players, set(), board_encoders)
+    versions = [player.board.version for player in players]
+
+    # Tiles no player sees change, the views stay as they are
+    for x, y in [(x, y) for x in range(board.height) for y in range(board.width) if all(player.vision.fog_counts[x, y] == 0 for player in players)][:3]:
+        board.set_tile_type(x, y, TileType.VOID)
+        build_views(board, players, board.pop_changed_tiles(), board_encoders)
+
+    assert [player.board.version for player in players] == versions
+    # The keyframe and the empty delta are encoded once, the next turns reuse the delta
+    assert all((cache.misses, cache.hits) == (2, 2) for cache in caches.values())
+
+def test_every_board_says_game_over():
+    board, players = generate_game([PlayerInfoDTO(f"p{i}", (i, i, i)) for i in range(3)], 24, 24, seed = 2)
+    players[1].pieces_exited = 3
+    apply_turn(board, players, [])
+    assert board.gameover and all(player.board.gameover for player in players)